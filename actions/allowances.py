@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+from ttl_cache import TTLCache
+
+MAX_UINT256 = 2**256 - 1
+
+EXACT = "exact"
+BOUNDED_MAX = "bounded_max"
+# No EIP-2612 permit strategy: LI.FI's transactionRequest is opaque
+# calldata, so a permit cannot be bundled into the swap. Sent as its own
+# transaction it costs as much gas as approve() and still needs a nonce.
+APPROVAL_STRATEGIES = (EXACT, BOUNDED_MAX)
+
+
+class AllowanceCache:
+    """
+    Last known allowance per (chain, owner, token, spender).
+
+    Entries come from on-chain reads and from our own approvals, and are
+    drawn down by our own swaps, so consecutive swaps of the same token
+    skip the `allowance` read and usually the approval as well. Entries
+    expire after `ttl` so approvals changed elsewhere are picked up.
+
+    Hold `lock(...)` from the check through the swap's `consume`, so two
+    swaps of the same token cannot both count the same allowance.
+    """
+
+    def __init__(self, ttl=600, maxsize=1024):
+        self.cache = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._locks = {}
+
+    @staticmethod
+    def key(chain, owner, token, spender):
+        return (chain.lower(), owner.lower(), token.lower(), spender.lower())
+
+    def lock(self, chain, owner, token, spender):
+        key = self.key(chain, owner, token, spender)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def get(self, chain, owner, token, spender):
+        return self.cache.get(self.key(chain, owner, token, spender))
+
+    def set(self, chain, owner, token, spender, allowance):
+        self.cache.set(self.key(chain, owner, token, spender), allowance)
+
+    def consume(self, chain, owner, token, spender, amount):
+        """Draws down a cached allowance after a swap spent `amount`."""
+        key = self.key(chain, owner, token, spender)
+        allowance = self.cache.pop(key)
+        if allowance is None:
+            return
+        # Unlimited approvals are not reduced by transferFrom
+        if allowance != MAX_UINT256:
+            allowance = max(allowance - amount, 0)
+        self.cache.set(key, allowance)
+
+    def invalidate(self, chain=None, owner=None):
+        if chain is None:
+            self.cache.invalidate()
+            return
+        chain, owner = chain.lower(), owner.lower() if owner else None
+        self.cache.invalidate(
+            lambda key: key[0] == chain and (owner is None or key[1] == owner)
+        )
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def approval_amount(strategy, amount, bounded_multiplier=10):
+    """
+    How much to approve for a swap of `amount`. `exact` approves just the
+    swap; `bounded_max` approves `bounded_multiplier` swaps' worth so the
+    next swaps of the token need no approval, without the unlimited
+    exposure of a max approval.
+    """
+    if strategy == BOUNDED_MAX:
+        return min(amount * bounded_multiplier, MAX_UINT256)
+    return amount
+
+
+allowance_cache = AllowanceCache(ttl=float(os.getenv("ALLOWANCE_CACHE_TTL", 600)))
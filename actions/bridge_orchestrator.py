@@ -0,0 +1,286 @@
+import asyncio
+import json
+import os
+import time
+
+PENDING = "PENDING"
+# Signed and about to be broadcast; the hash and nonce are saved first
+SUBMITTING = "SUBMITTING"
+SUBMITTED = "SUBMITTED"
+DONE = "DONE"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+class BridgeLeg:
+    __slots__ = (
+        "destination_chain",
+        "amount",
+        "status",
+        "tx_hash",
+        "approve_tx_hash",
+        "bridge",
+        "nonce",
+        "error",
+        "submitted_at",
+        "finished_at",
+    )
+
+    def __init__(
+        self,
+        destination_chain,
+        amount,
+        status=PENDING,
+        tx_hash=None,
+        approve_tx_hash=None,
+        bridge=None,
+        nonce=None,
+        error=None,
+        submitted_at=None,
+        finished_at=None,
+    ):
+        self.destination_chain = destination_chain
+        self.amount = amount
+        self.status = status
+        self.tx_hash = tx_hash
+        self.approve_tx_hash = approve_tx_hash
+        self.bridge = bridge
+        self.nonce = nonce
+        self.error = error
+        self.submitted_at = submitted_at
+        self.finished_at = finished_at
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def latency(self):
+        """Seconds from broadcast to the bridge reporting done or failed."""
+        if self.submitted_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.submitted_at
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        latency = f"{self.latency:.1f}s" if self.latency is not None else "-"
+        return (
+            f"BridgeLeg({self.destination_chain}, {self.status}, "
+            f"tx={self.tx_hash}, latency={latency})"
+        )
+
+
+class BridgeRun:
+    """One split send: the same source and tokens, one leg per destination."""
+
+    def __init__(
+        self, run_id, starting_chain, from_token, to_token, account_address, legs
+    ):
+        self.run_id = run_id
+        self.starting_chain = starting_chain
+        self.from_token = from_token
+        self.to_token = to_token
+        self.account_address = account_address
+        self.legs = legs
+
+    @property
+    def finished(self):
+        return all(leg.finished for leg in self.legs)
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "starting_chain": self.starting_chain,
+            "from_token": self.from_token,
+            "to_token": self.to_token,
+            "account_address": self.account_address,
+            "legs": [leg.to_dict() for leg in self.legs],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["run_id"],
+            data["starting_chain"],
+            data["from_token"],
+            data["to_token"],
+            data["account_address"],
+            [BridgeLeg.from_dict(leg) for leg in data["legs"]],
+        )
+
+
+class BridgeOrchestrator:
+    """
+    Runs every leg of a split send concurrently. All legs are submitted at
+    once (the nonce manager keeps the account's transactions in order),
+    then each leg's receipt and bridge status are awaited independently,
+    so the total time is that of the slowest bridge rather than the sum.
+
+    `submit(starting_chain, destination_chain, from_token, to_token,
+    amount, account_address, private_key, on_signed=)` returns (tx_hash,
+    approve_tx_hash, bridge) and calls `on_signed(nonce, tx_hash)` before
+    broadcasting; `confirm(starting_chain, account_address, tx_hash,
+    approve_tx_hash, destination_chain=, bridge=)` returns (receipt,
+    succeeded).
+
+    With a `state_path`, every leg transition is written to disk (never
+    the private key), so unfinished runs can be resumed or cancelled
+    after a restart. A leg saved as SUBMITTING may or may not have been
+    broadcast; on resume `find_signed(starting_chain, account_address,
+    tx_hash, nonce)` decides whether it is watched or submitted again.
+    """
+
+    def __init__(self, submit, confirm, state_path=None, find_signed=None):
+        self.submit = submit
+        self.confirm = confirm
+        self.state_path = state_path
+        self.find_signed = find_signed
+        self.runs = self._load()
+        self._tasks = {}
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r") as file:
+            data = json.load(file)
+        return {run_id: BridgeRun.from_dict(run) for run_id, run in data.items()}
+
+    def _save(self):
+        if not self.state_path:
+            return
+        data = {run_id: run.to_dict() for run_id, run in self.runs.items()}
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temporary_path, self.state_path)
+
+    def unfinished_runs(self):
+        return [run for run in self.runs.values() if not run.finished]
+
+    async def _find_signed(self, run, leg):
+        if self.find_signed is None:
+            raise Exception(f"Unknown whether {leg.tx_hash} was broadcast")
+        return await self.find_signed(
+            run.starting_chain, run.account_address, leg.tx_hash, leg.nonce
+        )
+
+    async def _run_leg(self, run, leg, private_key):
+        def on_signed(nonce, tx_hash):
+            leg.status = SUBMITTING
+            leg.nonce = nonce
+            leg.tx_hash = tx_hash if isinstance(tx_hash, str) else tx_hash.hex()
+            self._save()
+
+        try:
+            if leg.status == SUBMITTING:
+                # Interrupted between signing and broadcast: never send twice
+                if await self._find_signed(run, leg):
+                    leg.status = SUBMITTED
+                    leg.submitted_at = time.time()
+                else:
+                    leg.status = PENDING
+                self._save()
+            if leg.status == PENDING:
+                leg.tx_hash, leg.approve_tx_hash, leg.bridge = await self.submit(
+                    run.starting_chain,
+                    leg.destination_chain,
+                    run.from_token,
+                    run.to_token,
+                    leg.amount,
+                    run.account_address,
+                    private_key,
+                    on_signed=on_signed,
+                )
+                if not isinstance(leg.tx_hash, str):
+                    leg.tx_hash = leg.tx_hash.hex()
+                if leg.approve_tx_hash is not None and not isinstance(
+                    leg.approve_tx_hash, str
+                ):
+                    leg.approve_tx_hash = leg.approve_tx_hash.hex()
+                leg.status = SUBMITTED
+                leg.submitted_at = time.time()
+                self._save()
+            _, succeeded = await self.confirm(
+                run.starting_chain,
+                run.account_address,
+                leg.tx_hash,
+                leg.approve_tx_hash,
+                destination_chain=leg.destination_chain,
+                bridge=leg.bridge,
+            )
+            leg.status = DONE if succeeded else FAILED
+        except asyncio.CancelledError:
+            # Shutdown or a cancelled caller: the saved status stays as is so
+            # resume() picks the leg up; only cancel() marks it CANCELLED
+            raise
+        except Exception as e:
+            leg.status = FAILED
+            leg.error = str(e)
+        finally:
+            if leg.finished:
+                leg.finished_at = time.time()
+            self._save()
+            print(f"{run.run_id}: {leg}")
+
+    async def _execute(self, run, private_key):
+        legs = [leg for leg in run.legs if not leg.finished]
+        tasks = [
+            asyncio.create_task(self._run_leg(run, leg, private_key)) for leg in legs
+        ]
+        self._tasks[run.run_id] = tasks
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._tasks.pop(run.run_id, None)
+        return run
+
+    async def run(
+        self,
+        run_id,
+        starting_chain,
+        amounts_by_chain,
+        from_token,
+        to_token,
+        account_address,
+        private_key,
+    ):
+        """`amounts_by_chain` maps each destination chain to its amount in wei."""
+        run = BridgeRun(
+            run_id,
+            starting_chain,
+            from_token,
+            to_token,
+            account_address,
+            [BridgeLeg(chain, amount) for chain, amount in amounts_by_chain.items()],
+        )
+        self.runs[run_id] = run
+        self._save()
+        return await self._execute(run, private_key)
+
+    async def resume(self, run_id, private_key):
+        """
+        Continues an unfinished run. Legs already broadcast are only watched,
+        legs never broadcast are submitted now, and legs interrupted
+        between signing and broadcast are looked up before either.
+        """
+        return await self._execute(self.runs[run_id], private_key)
+
+    def cancel(self, run_id):
+        """
+        Stops the legs of a run. Legs already broadcast cannot be recalled
+        on-chain; they stop being watched and are marked cancelled.
+        """
+        for leg in self.runs[run_id].legs:
+            if not leg.finished:
+                leg.status = CANCELLED
+                leg.finished_at = time.time()
+        self._save()
+        for task in self._tasks.get(run_id, []):
+            task.cancel()
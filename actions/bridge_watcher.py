@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import time
+
+FINAL_STATUSES = ("DONE", "FAILED", "INVALID")
+
+# Rough completion times in seconds until real ones have been observed
+DEFAULT_EXPECTED_DURATION = 60.0
+SAME_CHAIN_EXPECTED_DURATION = 15.0
+
+
+class WatchedTransaction:
+    __slots__ = (
+        "tx_hash",
+        "bridge",
+        "from_chain",
+        "to_chain",
+        "started",
+        "deadline",
+        "future",
+        "waiters",
+        "polls",
+        "overdue_polls",
+        "last_status",
+    )
+
+    def __init__(self, tx_hash, bridge, from_chain, to_chain, started, deadline, future):
+        self.tx_hash = tx_hash
+        self.bridge = bridge
+        self.from_chain = from_chain
+        self.to_chain = to_chain
+        self.started = started
+        self.deadline = deadline
+        self.future = future
+        self.waiters = 0
+        self.polls = 0
+        self.overdue_polls = 0
+        self.last_status = None
+
+    @property
+    def duration_key(self):
+        if self.from_chain is not None and self.from_chain == self.to_chain:
+            return "same-chain"
+        return self.bridge or "default"
+
+
+class BridgeStatusWatcher:
+    """
+    Tracks many LI.FI transfers from one background task.
+
+    `watch` returns a future that resolves to the final status body (DONE,
+    FAILED or INVALID) or fails with `asyncio.TimeoutError` at the
+    deadline. All watched hashes share one schedule, so only the
+    transfers that are due are polled on each wake-up.
+
+    Polling adapts to how long each bridge usually takes: while a transfer
+    is younger than the expected duration it is polled at half the
+    remaining time, then at `min_interval` doubling up to `max_interval`.
+    Expected durations are an EWMA of completed transfers per bridge.
+    """
+
+    def __init__(
+        self,
+        get_status,
+        min_interval=2.0,
+        max_interval=30.0,
+        deadline=1800.0,
+        smoothing=0.3,
+    ):
+        self.get_status = get_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.deadline = deadline
+        self.smoothing = smoothing
+        self.expected_durations = {"same-chain": SAME_CHAIN_EXPECTED_DURATION}
+        self.polls = 0
+        self._watched = {}
+        self._schedule = []
+        self._wakeup = None
+        self._task = None
+
+    @property
+    def watching(self):
+        return len(self._watched)
+
+    def expected_duration(self, key):
+        return self.expected_durations.get(key, DEFAULT_EXPECTED_DURATION)
+
+    def _record_duration(self, key, duration):
+        previous = self.expected_durations.get(key)
+        if previous is None:
+            self.expected_durations[key] = duration
+        else:
+            self.expected_durations[key] = (
+                self.smoothing * duration + (1 - self.smoothing) * previous
+            )
+
+    def _next_interval(self, watched, now):
+        remaining = self.expected_duration(watched.duration_key) - (
+            now - watched.started
+        )
+        if remaining > 0:
+            interval = remaining / 2
+        else:
+            interval = self.min_interval * 2**watched.overdue_polls
+            watched.overdue_polls += 1
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _schedule_poll(self, watched, at):
+        heapq.heappush(self._schedule, (at, watched.tx_hash))
+        self._wakeup.set()
+
+    def watch(
+        self,
+        tx_hash,
+        bridge=None,
+        from_chain=None,
+        to_chain=None,
+        deadline=None,
+        on_done=None,
+    ):
+        """
+        Starts tracking `tx_hash`; watching a hash twice shares one poll.
+        Every caller gets its own future, so cancelling one waiter leaves
+        the others waiting; the hash is dropped once all of them cancel.
+        `on_done(status)` is called once with the final status.
+        """
+        watched = self._watched.get(tx_hash)
+        if watched is None:
+            now = time.monotonic()
+            watched = WatchedTransaction(
+                tx_hash,
+                bridge,
+                from_chain,
+                to_chain,
+                now,
+                now + (deadline if deadline is not None else self.deadline),
+                asyncio.get_running_loop().create_future(),
+            )
+            self._watched[tx_hash] = watched
+            if self._task is None or self._task.done():
+                # Created here so the event belongs to the running loop
+                self._wakeup = asyncio.Event()
+                self._task = asyncio.create_task(self._run())
+            self._schedule_poll(watched, now + self.min_interval)
+        if on_done is not None:
+
+            def callback(future):
+                if not future.cancelled() and future.exception() is None:
+                    on_done(future.result())
+
+            watched.future.add_done_callback(callback)
+        watched.waiters += 1
+        waiter = asyncio.shield(watched.future)
+
+        def release(waiter):
+            watched.waiters -= 1
+            if (
+                waiter.cancelled()
+                and watched.waiters == 0
+                and self._watched.get(tx_hash) is watched
+            ):
+                self.unwatch(tx_hash)
+
+        waiter.add_done_callback(release)
+        return waiter
+
+    def unwatch(self, tx_hash):
+        watched = self._watched.pop(tx_hash, None)
+        if watched is not None and not watched.future.done():
+            watched.future.cancel()
+
+    async def _poll(self, watched):
+        self.polls += 1
+        watched.polls += 1
+        try:
+            status = await self.get_status(
+                watched.tx_hash,
+                bridge=watched.bridge,
+                from_chain=watched.from_chain,
+                to_chain=watched.to_chain,
+            )
+        except Exception as e:
+            print(f"Status check for {watched.tx_hash} failed: {e}")
+            return None
+        watched.last_status = status.get("status")
+        return status
+
+    def _finish(self, watched, status):
+        self._watched.pop(watched.tx_hash, None)
+        if status.get("status") == "DONE":
+            duration = time.monotonic() - watched.started
+            # Learn under the key lookups use and the bridge LI.FI picked
+            keys = {watched.duration_key, status.get("tool") or watched.duration_key}
+            for key in keys:
+                self._record_duration(key, duration)
+        if not watched.future.done():
+            watched.future.set_result(status)
+
+    async def _run(self):
+        while self._watched:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = []
+            while self._schedule and self._schedule[0][0] <= now:
+                _, tx_hash = heapq.heappop(self._schedule)
+                watched = self._watched.get(tx_hash)
+                if watched is not None:
+                    due.append(watched)
+
+            if due:
+                statuses = await asyncio.gather(*[self._poll(w) for w in due])
+                now = time.monotonic()
+                for watched, status in zip(due, statuses):
+                    if self._watched.get(watched.tx_hash) is not watched:
+                        continue
+                    if status is not None and status.get("status") in FINAL_STATUSES:
+                        self._finish(watched, status)
+                    elif now >= watched.deadline:
+                        self._watched.pop(watched.tx_hash, None)
+                        if watched.future.done():
+                            continue
+                        watched.future.set_exception(
+                            asyncio.TimeoutError(
+                                f"{watched.tx_hash} still {watched.last_status} "
+                                f"after {now - watched.started:.0f}s"
+                            )
+                        )
+                    else:
+                        self._schedule_poll(
+                            watched,
+                            min(now + self._next_interval(watched, now), watched.deadline),
+                        )
+                continue
+
+            if not self._schedule:
+                break
+            timeout = self._schedule[0][0] - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
+from solana.rpc.types import TxOpts
+from solana.rpc.websocket_api import connect
+
+
+class EndpointStats:
+    """Send latency of one RPC endpoint, as an exponentially weighted average."""
+
+    __slots__ = ("url", "sends", "failures", "first_accepts", "latency_ms")
+
+    def __init__(self, url):
+        self.url = url
+        self.sends = 0
+        self.failures = 0
+        self.first_accepts = 0
+        self.latency_ms = None
+
+    def record(self, latency_ms, ok, alpha=0.2):
+        self.sends += 1
+        if not ok:
+            self.failures += 1
+            return
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += alpha * (latency_ms - self.latency_ms)
+
+    def score(self):
+        # Unmeasured endpoints rank first so they get sampled
+        latency = self.latency_ms if self.latency_ms is not None else 0.0
+        failure_rate = self.failures / self.sends if self.sends else 0.0
+        return latency * (1 + 4 * failure_rate)
+
+
+class SubmissionResult:
+    def __init__(self, signature):
+        self.signature = signature
+        self.confirmed = False
+        self.expired = False
+        self.err = None
+        # Set when no endpoint accepted the first broadcast
+        self.send_error = None
+        self.broadcasts = 0
+        self.elapsed = 0.0
+
+    @property
+    def landed(self):
+        return self.confirmed and self.err is None
+
+
+class TransactionBroadcaster:
+    """
+    Sends one signed transaction to every configured RPC endpoint at once and
+    keeps rebroadcasting it until it is confirmed or its blockhash expires.
+
+    Confirmation comes from a `signatureSubscribe` on `ws_url`, raced against
+    slower status polling in case the notification is missed or the websocket
+    is unavailable. Per-endpoint send
+    latency is recorded so `ranked_endpoints` can order them over time.
+    """
+
+    def __init__(
+        self,
+        endpoint_urls,
+        ws_url=None,
+        rebroadcast_interval=2.0,
+        commitment=Confirmed,
+        skip_preflight=True,
+        connect=connect,
+    ):
+        self.clients = {url: AsyncClient(url) for url in dict.fromkeys(endpoint_urls)}
+        self.stats = {url: EndpointStats(url) for url in self.clients}
+        self.ws_url = ws_url
+        self.rebroadcast_interval = rebroadcast_interval
+        self.commitment = commitment
+        self.skip_preflight = skip_preflight
+        self.connect = connect
+        # Sends still running after `broadcast` returned, kept so they finish
+        self._sends = set()
+
+    def ranked_endpoints(self):
+        return sorted(self.stats.values(), key=EndpointStats.score)
+
+    async def _send_one(self, url, raw_transaction):
+        started = time.perf_counter()
+        try:
+            await self.clients[url].send_raw_transaction(
+                raw_transaction,
+                opts=TxOpts(
+                    skip_preflight=self.skip_preflight,
+                    preflight_commitment=self.commitment,
+                    max_retries=0,
+                ),
+            )
+            error = None
+        except Exception as e:
+            print(f"Broadcast to {url} failed: {e}")
+            error = e
+        self.stats[url].record((time.perf_counter() - started) * 1000, error is None)
+        return url, error
+
+    async def broadcast(self, raw_transaction):
+        """
+        Sends to every endpoint and returns None as soon as the first one
+        accepts, or the last error if all of them reject the transaction.
+        """
+        sends = [
+            asyncio.create_task(self._send_one(url, raw_transaction))
+            for url in self.clients
+        ]
+        for send in sends:
+            self._sends.add(send)
+            send.add_done_callback(self._sends.discard)
+        # Slower endpoints keep sending in the background and still get measured
+        for send in asyncio.as_completed(sends):
+            url, error = await send
+            if error is None:
+                self.stats[url].first_accepts += 1
+                return None
+        return error
+
+    async def _wait_websocket(self, signature):
+        async with self.connect(self.ws_url) as websocket:
+            await websocket.signature_subscribe(signature, commitment=self.commitment)
+            async for messages in websocket:
+                for notification in messages:
+                    value = getattr(getattr(notification, "result", None), "value", None)
+                    if value is not None and hasattr(value, "err"):
+                        return value.err
+        raise ConnectionError("Signature subscription closed")
+
+    async def _wait_polling(self, signature):
+        client = self.clients[self.ranked_endpoints()[0].url]
+        while True:
+            try:
+                response = await client.get_signature_statuses([signature])
+                status = response.value[0]
+                if status is not None and status.satisfies_commitment(self.commitment):
+                    return status.err
+            except Exception as e:
+                print(f"Signature status check failed: {e}")
+            await asyncio.sleep(self.rebroadcast_interval / 2)
+
+    async def _wait_confirmation(self, signature):
+        """Returns the transaction error (None on success) once it is confirmed."""
+        waiters = {asyncio.create_task(self._wait_polling(signature))}
+        if self.ws_url is not None:
+            waiters.add(asyncio.create_task(self._wait_websocket(signature)))
+        try:
+            while waiters:
+                done, waiters = await asyncio.wait(
+                    waiters, return_when=asyncio.FIRST_COMPLETED
+                )
+                for waiter in done:
+                    if waiter.exception() is None:
+                        return waiter.result()
+                    print(f"Signature subscription failed: {waiter.exception()}")
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def _blockhash_expired(self, last_valid_block_height):
+        client = self.clients[self.ranked_endpoints()[0].url]
+        try:
+            response = await client.get_block_height(self.commitment)
+        except Exception as e:
+            print(f"Block height check failed: {e}")
+            return False
+        return response.value > last_valid_block_height
+
+    async def lookup(self, signature):
+        """
+        The signature's status, or None if the node has never seen it. For
+        deciding what happened after `submit` stopped without a confirmation.
+        """
+        client = self.clients[self.ranked_endpoints()[0].url]
+        response = await client.get_signature_statuses(
+            [signature], search_transaction_history=True
+        )
+        return response.value[0]
+
+    async def submit(self, signed_transaction, last_valid_block_height, timeout=75):
+        """
+        Lands `signed_transaction` (a solders VersionedTransaction). Never
+        raises on a failed or expired transaction; check the returned
+        SubmissionResult instead. The default `timeout` outlasts a
+        blockhash (about 60s), so an expiry is normally noticed first.
+        """
+        raw_transaction = bytes(signed_transaction)
+        result = SubmissionResult(signed_transaction.signatures[0])
+        started = time.monotonic()
+        confirmation = asyncio.create_task(self._wait_confirmation(result.signature))
+        try:
+            while time.monotonic() - started < timeout:
+                error = await self.broadcast(raw_transaction)
+                if error is not None and result.broadcasts == 0:
+                    result.send_error = error
+                    break
+                result.broadcasts += 1
+                done, _ = await asyncio.wait(
+                    {confirmation}, timeout=self.rebroadcast_interval
+                )
+                if done:
+                    result.err = confirmation.result()
+                    result.confirmed = True
+                    break
+                if await self._blockhash_expired(last_valid_block_height):
+                    result.expired = True
+                    break
+        finally:
+            confirmation.cancel()
+            result.elapsed = time.monotonic() - started
+        return result
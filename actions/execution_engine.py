@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+
+class AccountStats:
+    __slots__ = ("address", "queued", "running", "completed", "failed", "busy_time")
+
+    def __init__(self, address):
+        self.address = address
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+
+    @property
+    def load(self):
+        return self.queued + self.running
+
+    def __repr__(self):
+        return (
+            f"AccountStats({self.address}, completed={self.completed}, "
+            f"failed={self.failed}, busy={self.busy_time:.1f}s, load={self.load})"
+        )
+
+
+class ExecutionEngine:
+    """
+    Spreads swaps over every configured account.
+
+    Each account has its own queue and `per_account_concurrency` workers,
+    so accounts never share nonces and one account's slow bridge does not
+    hold up the others. Jobs go to the account named in `submit`, or to
+    the least loaded one. Throughput grows with the number of accounts.
+
+    `execute(account, *args)` runs one job; `account` is a dict with
+    "address" and "private_key" as returned by `get_accounts_from_env`.
+    """
+
+    def __init__(self, accounts, execute, per_account_concurrency=1):
+        if not accounts:
+            raise ValueError("At least one account is required.")
+        self.accounts = {account["address"].lower(): account for account in accounts}
+        self.execute = execute
+        self.per_account_concurrency = per_account_concurrency
+        self.stats = {address: AccountStats(address) for address in self.accounts}
+        self._queues = {}
+        self._workers = []
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        for address in self.accounts:
+            self._queues[address] = asyncio.Queue()
+            for _ in range(self.per_account_concurrency):
+                self._workers.append(asyncio.create_task(self._worker(address)))
+
+    async def _worker(self, address):
+        account = self.accounts[address]
+        stats = self.stats[address]
+        queue = self._queues[address]
+        while True:
+            args, future = await queue.get()
+            stats.queued -= 1
+            if future.cancelled():
+                queue.task_done()
+                continue
+            stats.running += 1
+            started = time.monotonic()
+            try:
+                result = await self.execute(account, *args)
+            except Exception as e:
+                stats.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                stats.completed += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                stats.running -= 1
+                stats.busy_time += time.monotonic() - started
+                queue.task_done()
+
+    def least_loaded_account(self):
+        return min(self.stats.values(), key=lambda stats: stats.load).address
+
+    def submit(self, *args, account_address=None):
+        """Queues one job and returns a future for its result."""
+        self._ensure_started()
+        address = (account_address or self.least_loaded_account()).lower()
+        if address not in self.accounts:
+            raise ValueError(f"Account {address} is not configured.")
+        future = asyncio.get_running_loop().create_future()
+        self.stats[address].queued += 1
+        self._queues[address].put_nowait((args, future))
+        return future
+
+    async def run_many(self, jobs):
+        """
+        Runs a list of argument tuples across all accounts. Results are in
+        job order; failed jobs return their exception.
+        """
+        return await asyncio.gather(
+            *[self.submit(*job) for job in jobs], return_exceptions=True
+        )
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
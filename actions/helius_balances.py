@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import httpx
+
+from http_clients import get_http_client
+from retry import FatalError, RetryableError, RetryPolicy
+
+HELIUS_API_URL = "https://api.helius.xyz/v0"
+
+# Bodies above this size are decoded in a worker thread
+OFF_LOOP_DECODE_BYTES = 64 * 1024
+
+
+class HeliusBalancesClient:
+    """
+    Async replacement for `helius.BalancesAPI`.
+
+    Requests share one keep-alive connection pool and have a timeout. Large
+    responses are decoded in a worker thread so the event loop stays free.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        timeout=10.0,
+        max_connections=10,
+        concurrency=5,
+        retry_policy=None,
+    ):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.concurrency = concurrency
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=3, base_delay=0.25, max_delay=2, deadline=15
+        )
+
+    @property
+    def client(self):
+        return get_http_client(
+            "helius",
+            base_url=HELIUS_API_URL,
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    async def _get_balances_once(self, address):
+        response = await self.client.get(
+            f"/addresses/{address}/balances", params={"api-key": self.api_key}
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"Helius API returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise FatalError(
+                f"Helius API returned HTTP {response.status_code}: {response.text}"
+            )
+        if len(response.content) > OFF_LOOP_DECODE_BYTES:
+            return await asyncio.to_thread(json.loads, response.content)
+        return response.json()
+
+    async def get_balances(self, address):
+        return await self.retry_policy.run(lambda: self._get_balances_once(address))
+
+    async def get_balances_many(self, addresses):
+        """
+        Looks up many owners at once, with at most `concurrency` requests in
+        flight. Returns a dict mapping each address to its balances.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def get_one(address):
+            async with semaphore:
+                return await self.get_balances(address)
+
+        addresses = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(*[get_one(address) for address in addresses])
+        return dict(zip(addresses, results))
@@ -0,0 +1,36 @@
+from typing import NamedTuple
+
+
+class Holding(NamedTuple):
+    """Wallet balance of one Jupiter-listed token, in the token's smallest unit."""
+
+    mint: str
+    amount: int
+    symbol: str
+    name: str
+    decimals: int
+
+    def to_dict(self):
+        return self._asdict()
+
+
+def join_holdings(wallet_tokens, tokens_by_mint):
+    """
+    Matches wallet balances against a mint-keyed token index. Costs one dict
+    lookup per holding, whatever the size of the token list. Tokens that
+    Jupiter does not list are dropped.
+    """
+    holdings = []
+    for wallet_token in wallet_tokens:
+        token = tokens_by_mint.get(wallet_token["mint"])
+        if token is not None:
+            holdings.append(
+                Holding(
+                    mint=wallet_token["mint"],
+                    amount=wallet_token["amount"],
+                    symbol=token.get("symbol", ""),
+                    name=token.get("name", ""),
+                    decimals=token.get("decimals", 0),
+                )
+            )
+    return holdings
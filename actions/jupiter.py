@@ -1,5 +1,8 @@
+import asyncio
 import base58
 import base64
+import dotenv
+import functools
 import json
 import os
 import time
@@ -7,38 +10,186 @@ import time
 from solders import message
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
+from solders.signature import Signature
 from solders.transaction import VersionedTransaction
 
 from solana.rpc.async_api import AsyncClient
-from solana.rpc.commitment import Processed
-from solana.rpc.types import TxOpts
 
-from helius import BalancesAPI
-
-from jupiter_python_sdk.jupiter import Jupiter
+from actions.broadcast import TransactionBroadcaster
+from actions.helius_balances import HeliusBalancesClient
+from actions.holdings import join_holdings
+from actions.portfolio import PortfolioTracker
+from actions.quote_cache import QuoteCache
+from actions.simulation import classify_simulation_error, simulate_transaction
+from actions.token_registry import TokenRegistry
+from actions.valuation import SOL_MINT, ValuationEngine
+from http_clients import get_http_client
+from ratelimit import get_host_limiter
+from retry import FatalError, RetryableError, RetryBudgetExceeded, RetryPolicy, RetryStats
+from signing import sign_solana_message
+from tool_memo import PartialResult
+
+dotenv.load_dotenv()
 
 SOLANA_RPC_ENDPOINT_URL = (
     f"https://mainnet.helius-rpc.com/?api-key={os.getenv('HELIOUS_API_KEY')}"
 )
-balances_api = BalancesAPI(os.getenv("HELIOUS_API_KEY"))
-private_key_string = os.getenv("SOLANA_PRIVATE_KEY_1")
-private_key_bytes = base58.b58decode(private_key_string)
-private_key = Keypair.from_bytes(private_key_bytes)
-
-async_client = AsyncClient(SOLANA_RPC_ENDPOINT_URL)
-jupiter = Jupiter(
-    async_client=async_client,
-    keypair=private_key,
+SOLANA_WS_ENDPOINT_URL = os.getenv(
+    "SOLANA_WS_ENDPOINT_URL",
+    f"wss://mainnet.helius-rpc.com/?api-key={os.getenv('HELIOUS_API_KEY')}",
+)
+PORTFOLIO_TRACKING = os.getenv("SOLANA_PORTFOLIO_TRACKING", "1") == "1"
+JUPITER_QUOTE_API_URL = "https://quote-api.jup.ag/v6/quote"
+JUPITER_SWAP_API_URL = "https://quote-api.jup.ag/v6/swap"
+JUPITER_TOKEN_LIST_URL = "https://token.jup.ag/{list_type}"
+balances_api = HeliusBalancesClient(os.getenv("HELIOUS_API_KEY"))
+# Extra RPC endpoints (comma separated) that every swap is broadcast to
+SOLANA_BROADCAST_ENDPOINT_URLS = [SOLANA_RPC_ENDPOINT_URL] + [
+    url.strip() for url in os.getenv("SOLANA_RPC_ENDPOINTS", "").split(",") if url.strip()
+]
+
+
+# Keys and RPC clients are created on first use, so importing the tools costs
+# nothing for avatars that never trade on Solana
+@functools.lru_cache(maxsize=None)
+def get_private_key():
+    private_key_string = os.getenv("SOLANA_PRIVATE_KEY_1")
+    private_key_bytes = base58.b58decode(private_key_string)
+    return Keypair.from_bytes(private_key_bytes)
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_client():
+    return AsyncClient(SOLANA_RPC_ENDPOINT_URL)
+
+
+@functools.lru_cache(maxsize=None)
+def get_broadcaster():
+    return TransactionBroadcaster(
+        SOLANA_BROADCAST_ENDPOINT_URLS,
+        ws_url=SOLANA_WS_ENDPOINT_URL,
+        # Swaps are simulated explicitly before they are broadcast
+        skip_preflight=True,
+    )
+
+
+# Read-only Jupiter API calls: quick retries within a few seconds
+jupiter_api_retry_policy = RetryPolicy(
+    max_attempts=3, base_delay=0.25, max_delay=2, deadline=10
+)
+
+
+async def _jupiter_request(method, url, **kwargs):
+    """
+    Sends a request over the shared Jupiter client and decodes the JSON body.
+    Throttling and server errors are retryable, other HTTP errors are fatal.
+    """
+    response = await get_http_client("jupiter").request(method, url, **kwargs)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableError(f"Jupiter API returned HTTP {response.status_code}")
+    body = response.json()
+    if response.status_code >= 400:
+        raise FatalError(body.get("error", f"HTTP {response.status_code}"))
+    return body
+
+
+async def fetch_jupiter_tokens(list_type):
+    return await jupiter_api_retry_policy.run(
+        lambda: _jupiter_request(
+            "GET", JUPITER_TOKEN_LIST_URL.format(list_type=list_type)
+        )
+    )
+
+
+token_registry = TokenRegistry(
+    fetch_jupiter_tokens, ttl=int(os.getenv("JUPITER_TOKEN_LIST_TTL", 3600))
+)
+
+
+quote_cache = QuoteCache(ttl=float(os.getenv("JUPITER_QUOTE_CACHE_TTL", 2)))
+# Quotes older than this are never reused to build a swap transaction
+SWAP_QUOTE_MAX_AGE = float(os.getenv("JUPITER_SWAP_QUOTE_MAX_AGE", 1))
+# How long one attempt keeps rebroadcasting; outlasts a blockhash (~60s)
+SWAP_SUBMIT_TIMEOUT = float(os.getenv("JUPITER_SWAP_SUBMIT_TIMEOUT", 75))
+
+valuation_engine = ValuationEngine(
+    quote=lambda from_mint, to_mint, amount: get_cached_quote_solana(
+        from_mint, to_mint, amount
+    ),
+    concurrency=int(os.getenv("JUPITER_QUOTE_CONCURRENCY", 8)),
+    limiter=get_host_limiter(
+        JUPITER_QUOTE_API_URL, rate=float(os.getenv("JUPITER_QUOTE_RATE", 10))
+    ),
 )
 
 
+async def fetch_quote_solana(
+    from_token_mint, to_token_mint, amount, slippage=25, retry=True
+):
+    """
+    Requests a quote from the Jupiter API over the shared keep-alive client,
+    so many quotes can be in flight at once. Raises when no route is found.
+    With `retry=False` it makes a single request, for callers that retry
+    the whole operation themselves.
+    """
+    params = {
+        "inputMint": from_token_mint,
+        "outputMint": to_token_mint,
+        "amount": int(amount),
+        "slippageBps": slippage,
+    }
+    request = lambda: _jupiter_request("GET", JUPITER_QUOTE_API_URL, params=params)
+    if retry:
+        quote = await jupiter_api_retry_policy.run(request)
+    else:
+        quote = await request()
+    if "routePlan" not in quote:
+        raise FatalError(quote.get("error", "No suitable quote found."))
+    return quote
+
+
+async def fetch_swap_transaction(quote):
+    """
+    Asks Jupiter to build the swap transaction for `quote`, without
+    re-quoting. Returns the response with `swapTransaction` and
+    `lastValidBlockHeight`.
+    """
+    return await _jupiter_request(
+        "POST",
+        JUPITER_SWAP_API_URL,
+        json={
+            "quoteResponse": quote,
+            "userPublicKey": str(get_private_key().pubkey()),
+            "wrapAndUnwrapSol": True,
+        },
+    )
+
+
+async def get_cached_quote_solana(
+    from_token_mint,
+    to_token_mint,
+    amount,
+    slippage=25,
+    exact=False,
+    max_age=None,
+    retry=True,
+):
+    return await quote_cache.get_or_fetch(
+        functools.partial(fetch_quote_solana, retry=retry),
+        from_token_mint,
+        to_token_mint,
+        amount,
+        slippage,
+        exact=exact,
+        max_age=max_age,
+    )
+
+
 async def get_quote_solana(from_token_mint, to_token_mint, amount, slippage=25):
     try:
-        quote = await jupiter.quote(
-            input_mint=from_token_mint,
-            output_mint=to_token_mint,
-            amount=amount,
-            slippage_bps=slippage,
+        # The user sees this amount: only valuation reads bucketed quotes
+        quote = await get_cached_quote_solana(
+            from_token_mint, to_token_mint, amount, slippage, exact=True
         )
     except Exception as e:
         quote = {
@@ -48,63 +199,156 @@ async def get_quote_solana(from_token_mint, to_token_mint, amount, slippage=25):
         return quote
 
 
+async def _swap_once(
+    from_token_mint, to_token_mint, amount, slippage, deadline_at, broadcast
+):
+    """
+    One quote, sign, simulate and broadcast attempt. The signature is put in
+    `broadcast` before it is sent, so the caller still has it if the
+    attempt is cut off by the deadline.
+    """
+    broadcast.clear()
+    # The swap's own retry policy covers the quote, so no nested retries
+    quote = await get_cached_quote_solana(
+        from_token_mint,
+        to_token_mint,
+        amount,
+        slippage,
+        exact=True,
+        max_age=SWAP_QUOTE_MAX_AGE,
+        retry=False,
+    )
+    swap = await fetch_swap_transaction(quote)
+
+    raw_transaction = VersionedTransaction.from_bytes(
+        base64.b64decode(swap["swapTransaction"])
+    )
+    signature = Signature.from_bytes(
+        await sign_solana_message(
+            message.to_bytes_versioned(raw_transaction.message),
+            bytes(get_private_key()),
+        )
+    )
+    signed_txn = VersionedTransaction.populate(raw_transaction.message, [signature])
+
+    simulation = await simulate_transaction(get_async_client(), signed_txn)
+    if not simulation.ok:
+        if simulation.fatal:
+            raise FatalError(f"Swap simulation failed: {simulation.describe()}")
+        raise RetryableError(f"Swap simulation failed: {simulation.describe()}")
+
+    broadcaster = get_broadcaster()
+    # Stop rebroadcasting before the retry deadline rather than be cut off
+    timeout = min(SWAP_SUBMIT_TIMEOUT, deadline_at - time.monotonic() - 2)
+    broadcast.append(str(signature))
+    submission = await broadcaster.submit(
+        signed_txn, swap["lastValidBlockHeight"], timeout=max(timeout, 1)
+    )
+    if submission.send_error is not None:
+        raise submission.send_error
+    transaction_id = str(submission.signature)
+    print(
+        f"Transaction {transaction_id}: confirmed={submission.confirmed} "
+        f"err={submission.err} broadcasts={submission.broadcasts} "
+        f"in {submission.elapsed:.1f}s, {simulation.units_consumed} compute units"
+    )
+    confirmed, err = submission.confirmed, submission.err
+    status = None
+    if not confirmed:
+        # Unconfirmed is not the same as not landed: look before re-sending
+        try:
+            status = await broadcaster.lookup(submission.signature)
+        except Exception as e:
+            raise FatalError(
+                f"Transaction {transaction_id} status unknown ({e}), check it "
+                "before swapping again"
+            )
+        if status is not None and status.satisfies_commitment(broadcaster.commitment):
+            confirmed, err = True, status.err
+    if confirmed:
+        if err is None:
+            return transaction_id, quote, simulation.units_consumed
+        error = f"Transaction {transaction_id} failed: {err}"
+        if classify_simulation_error(err, []):
+            raise RetryableError(error)
+        raise FatalError(error)
+    if submission.expired and status is None:
+        # Its blockhash expired unseen, so it can never land: safe to re-quote
+        raise RetryableError(f"Transaction {transaction_id} expired unconfirmed")
+    raise FatalError(
+        f"Transaction {transaction_id} was not confirmed in time, check it "
+        "before swapping again"
+    )
+
+
 async def execute_swap_solana(
-    from_token_mint, to_token_mint, amount, slippage=25, max_retries=3, retry_delay=5
+    from_token_mint,
+    to_token_mint,
+    amount,
+    slippage=25,
+    max_retries=3,
+    retry_delay=5,
+    deadline=2 * SWAP_SUBMIT_TIMEOUT,
 ):
     """
     Executes a swap with retry logic.
 
-    Parameters are the same as before, with two new ones:
-    - max_retries: int, the maximum number of retries upon failure.
-    - retry_delay: int, delay between retries in seconds.
+    - max_retries: int, the maximum number of attempts.
+    - retry_delay: int, base delay between attempts in seconds, doubled
+      (with jitter) after every failure.
+    - deadline: int, total time budget in seconds for all attempts; the
+      default fits a blockhash expiry and one re-quoted attempt.
+
+    Every attempt re-quotes and re-signs, but only once the previous
+    transaction has failed or its blockhash has expired unseen; a
+    transaction still unconfirmed at the deadline is reported, not resent.
+    Waiting between attempts never blocks the event loop, and closing the
+    websocket cancels the swap.
     """
-    attempt = 0
     amount = int(amount)
-    while attempt < max_retries:
-        try:
-            quote = await jupiter.quote(
-                input_mint=from_token_mint,
-                output_mint=to_token_mint,
-                amount=amount,
-                slippage_bps=slippage,
+    policy = RetryPolicy(
+        max_attempts=max_retries, base_delay=retry_delay, deadline=deadline
+    )
+    stats = RetryStats()
+    deadline_at = time.monotonic() + deadline
+    broadcast = []
+    try:
+        transaction_id, quote, compute_units = await policy.run(
+            lambda: _swap_once(
+                from_token_mint,
+                to_token_mint,
+                amount,
+                slippage,
+                deadline_at,
+                broadcast,
+            ),
+            stats=stats,
+        )
+    except RetryBudgetExceeded as e:
+        print(f"Swap failed: {e.stats}")
+        if isinstance(e.last_error, asyncio.TimeoutError) and broadcast:
+            # Cut off after sending, e.g. while looking up its status
+            return (
+                f"Swap timed out after transaction {broadcast[-1]} was sent. It "
+                "may still land, check "
+                f"https://explorer.solana.com/tx/{broadcast[-1]} before swapping again"
             )
-
-            if quote:
-                transaction_data = await jupiter.swap(
-                    input_mint=from_token_mint,
-                    output_mint=to_token_mint,
-                    amount=amount,
-                    slippage_bps=slippage,
-                )
-
-                raw_transaction = VersionedTransaction.from_bytes(
-                    base64.b64decode(transaction_data)
-                )
-                signature = private_key.sign_message(
-                    message.to_bytes_versioned(raw_transaction.message)
-                )
-                signed_txn = VersionedTransaction.populate(
-                    raw_transaction.message, [signature]
-                )
-                opts = TxOpts(skip_preflight=False, preflight_commitment=Processed)
-                result = await async_client.send_raw_transaction(
-                    txn=bytes(signed_txn), opts=opts
-                )
-                transaction_id = json.loads(result.to_json())["result"]
-                # print(
-                #     f"Transaction sent: https://explorer.solana.com/tx/{transaction_id}"
-                # )
-                return f"Transaction between {from_token_mint} and {to_token_mint} executed successfully. Sent {amount} {from_token_mint} with id https://explorer.solana.com/tx/{transaction_id}"
-            else:
-                raise Exception("No suitable quote found.")
-        except Exception as e:
-            print(f"Attempt {attempt + 1} failed: {e}")
-            attempt += 1
-            if attempt < max_retries:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                return "All retries exhausted. Transaction failed."
+        return f"All retries exhausted. Transaction failed: {e.last_error}"
+    except Exception as e:
+        print(f"Swap failed: {stats}")
+        return f"Transaction failed: {e}"
+
+    quote_cache.invalidate(from_token_mint)
+    quote_cache.invalidate(to_token_mint)
+    if portfolio_tracker is not None:
+        # The swap is confirmed, book it until the account updates arrive
+        portfolio_tracker.apply_swap(
+            from_token_mint, amount, to_token_mint, int(quote["outAmount"])
+        )
+    retries = ""
+    if stats.retries:
+        retries = f" after {stats.retries} retries ({stats.retry_wait:.1f}s spent waiting)"
+    return f"Transaction between {from_token_mint} and {to_token_mint} executed successfully{retries}, using {compute_units} compute units. Sent {amount} {from_token_mint} with id https://explorer.solana.com/tx/{transaction_id}"
 
 
 # def get_tokens_name_list():
@@ -113,26 +357,15 @@ async def execute_swap_solana(
 
 
 async def get_tokens_name_string():
-    token_list = await jupiter.get_tokens_list()
+    token_list = await token_registry.get_tokens(list_type="strict")
     return ", ".join([token["name"] for token in token_list])
 
 
 async def get_token_info_by_name_or_symbol(token_name_or_symbol):
-    token_list = await jupiter.get_tokens_list(list_type="all")
-    for token in token_list:
-        # lowercase both token and token["name"] to make it case insensitive
-        token_name_or_symbol = token_name_or_symbol.lower()
-        token_name_or_symbol = token_name_or_symbol.replace(" ", "")
-        if (
-            token["name"].lower() == token_name_or_symbol
-            or token["symbol"].lower() == token_name_or_symbol
-        ):
-            return token
-    return None
+    return await token_registry.find(token_name_or_symbol)
 
 
-async def get_assets_by_owner(wallet_address):
-    assets = balances_api.get_balances(wallet_address)
+def _assets_to_tokens(assets):
     tokens = assets["tokens"]
     tokens = [token for token in tokens if token["amount"] > 0]
     tokens = [{"mint": token["mint"], "amount": token["amount"]} for token in tokens]
@@ -141,7 +374,7 @@ async def get_assets_by_owner(wallet_address):
     native_balance = assets["nativeBalance"]
     tokens.append(
         {
-            "mint": "So11111111111111111111111111111111111111112",
+            "mint": SOL_MINT,
             "amount": native_balance,
         }
     )
@@ -149,50 +382,86 @@ async def get_assets_by_owner(wallet_address):
     return tokens
 
 
+async def get_assets_by_owner(wallet_address):
+    assets = await balances_api.get_balances(wallet_address)
+    return _assets_to_tokens(assets)
+
+
+async def get_assets_by_owners(wallet_addresses):
+    balances = await balances_api.get_balances_many(wallet_addresses)
+    return {
+        address: _assets_to_tokens(assets) for address, assets in balances.items()
+    }
+
+
 async def get_supported_jupiter_tokens(wallet_address):
-    jupiter_token_list = await jupiter.get_tokens_list(list_type="all")
-    wallet_tokens = await get_assets_by_owner(wallet_address=wallet_address)
+    token_index, wallet_tokens = await asyncio.gather(
+        token_registry.get_index(list_type="all"),
+        get_assets_by_owner(wallet_address=wallet_address),
+    )
+    return join_holdings(wallet_tokens, token_index.by_mint)
 
-    supported_tokens = []
-    for jupiter_token in jupiter_token_list:
-        for wallet_token in wallet_tokens:
-            if wallet_token["mint"] == jupiter_token["address"]:
-                wallet_token.update(jupiter_token)
-                supported_tokens.append(wallet_token)
 
-    return supported_tokens
+portfolio_tracker = None
 
 
-async def get_wallet_balance():
+def get_portfolio_tracker():
+    """Starts live tracking of the trading wallet on first use."""
+    global portfolio_tracker
+    if portfolio_tracker is None and PORTFOLIO_TRACKING:
+        portfolio_tracker = PortfolioTracker(
+            owner=os.getenv("SOLANA_ADDRESS_1"),
+            ws_url=SOLANA_WS_ENDPOINT_URL,
+            resync=balances_api.get_balances,
+        )
+        portfolio_tracker.start()
+    return portfolio_tracker
+
+
+async def get_wallet_holdings():
     wallet_address = os.getenv("SOLANA_ADDRESS_1")
-    tokens = await get_supported_jupiter_tokens(wallet_address=wallet_address)
-    return json.dumps(tokens)
+    tracker = get_portfolio_tracker()
+    if tracker is not None and tracker.synced:
+        token_index = await token_registry.get_index(list_type="all")
+        return join_holdings(tracker.snapshot(), token_index.by_mint)
+    return await get_supported_jupiter_tokens(wallet_address=wallet_address)
+
+
+async def get_wallet_balance():
+    holdings = await get_wallet_holdings()
+    return json.dumps([holding.to_dict() for holding in holdings])
+
+
+async def value_wallet_holdings():
+    holdings = await get_wallet_holdings()
+    report = await valuation_engine.value(
+        [(holding.mint, holding.amount) for holding in holdings]
+    )
+    return holdings, report
 
 
 async def get_wallet_balance_with_solana_values():
-    tokens = await get_wallet_balance()
-    tokens = json.loads(tokens)
-    for token in tokens:
-        if token["mint"] == "So11111111111111111111111111111111111111112":
-            token["solValue"] = token["amount"] / 1000000000
-        else:
-            # get quote for token
-            quote = await get_quote_solana(
-                token["mint"],
-                "So11111111111111111111111111111111111111112",
-                token["amount"],
-            )
-            token["solValue"] = int(quote["outAmount"]) / 1000000000
+    holdings, report = await value_wallet_holdings()
+    tokens = []
+    for holding, valuation in zip(holdings, report.valuations):
+        token = holding.to_dict()
+        # Tokens that could not be quoted keep a null value and the reason,
+        # so they are not mistaken for worthless holdings
+        token["solValue"] = valuation.sol_value
+        if not valuation.ok:
+            token["valuationError"] = valuation.error
+        tokens.append(token)
+    if report.failed:
+        return PartialResult(json.dumps(tokens), report.failed)
     return json.dumps(tokens)
 
 
 async def get_wallet_sol_value():
-    tokens = await get_wallet_balance_with_solana_values()
-    tokens = json.loads(tokens)
-    sol_value = 0
-    for token in tokens:
-        sol_value += token["solValue"]
-    return sol_value
+    _, report = await value_wallet_holdings()
+    if report.failed:
+        # The total leaves out the tokens that could not be valued
+        return PartialResult(report.total_sol_value, report.failed)
+    return report.total_sol_value
 
 
 # def get_token_info_by_name_or_symbol_async(token_name_or_symbol):
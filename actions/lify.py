@@ -1,8 +1,22 @@
-import requests
+import asyncio
+import functools
+import os
 import time
+from collections import Counter
+
+from web3.exceptions import TransactionNotFound
+
+from actions.allowances import allowance_cache, approval_amount
+from actions.bridge_orchestrator import BridgeOrchestrator
+from actions.bridge_watcher import BridgeStatusWatcher
+from actions.execution_engine import ExecutionEngine
+from chain_registry import get_chain_registry
+from gas_oracle import gas_oracle
+from lifi_client import lifi_client
+from nonce_manager import nonce_manager
+from signing import sign_evm_transaction
 from utils import (
-    load_files,
-    init_web3,
+    get_async_web3,
     get_chain_key,
     get_chain_id,
     convert_eth_to_wei,
@@ -10,57 +24,44 @@ from utils import (
     get_accounts_from_env,
 )
 
-# Load necessary data
-_, _, _, alchemy_url_list, _, _, erc20_abi, lifi_chains = load_files()
+# exact or bounded_max
+APPROVAL_STRATEGY = os.getenv("APPROVAL_STRATEGY", "exact")
+ALLOWANCE_BOUNDED_MULTIPLIER = int(os.getenv("ALLOWANCE_BOUNDED_MULTIPLIER", 10))
+# slow, standard or fast: the percentile of recent priority fees to pay
+GAS_PRESET = os.getenv("GAS_PRESET", "standard")
+
+bridge_watcher = BridgeStatusWatcher(
+    lifi_client.get_status,
+    deadline=float(os.getenv("BRIDGE_STATUS_DEADLINE", 1800)),
+)
 
 
-def get_tokens():
+async def get_tokens():
     optional_filter = ["BASE"]  # Both numeric and mnemonic can be used
     optional_chain_types = "EVM"  # By default, only EVM tokens will be returned
 
-    response = requests.get(
-        "https://li.quest/v1/tokens",
-        params={
-            "chains": ",".join(map(str, optional_filter)),
-            "chainTypes": optional_chain_types,
-        },
+    return await lifi_client.get_tokens(
+        chains=",".join(map(str, optional_filter)),
+        chain_types=optional_chain_types,
     )
-    return response.json()
 
 
-def get_quote(
+async def get_quote(
     starting_chain, destination_chain, from_token, to_token, from_amount, from_address
 ):
     starting_domain = get_chain_key(starting_chain)
     destination_domain = get_chain_key(destination_chain)
-    url = "https://li.quest/v1/quote"
-    params = {
-        "fromChain": starting_domain,
-        "toChain": destination_domain,
-        "fromToken": from_token,
-        "toToken": to_token,
-        "fromAmount": from_amount,
-        "fromAddress": from_address,
-    }
-    response = requests.get(url, params=params)
-    return response.json()
-
-
-def get_transaction_status(bridge, starting_chain, destination_chain, tx_hash):
-    starting_domain = get_chain_key(starting_chain)
-    destination_domain = get_chain_key(destination_chain)
-    url = "https://li.quest/v1/status"
-    params = {
-        "bridge": bridge,
-        "fromChain": starting_domain,
-        "toChain": destination_domain,
-        "txHash": tx_hash,
-    }
-    response = requests.get(url, params=params)
-    return response.json()
+    return await lifi_client.get_quote(
+        fromChain=starting_domain,
+        toChain=destination_domain,
+        fromToken=from_token,
+        toToken=to_token,
+        fromAmount=from_amount,
+        fromAddress=from_address,
+    )
 
 
-def check_and_set_allowance(
+async def check_and_set_allowance(
     web3,
     chain,
     account_address,
@@ -69,35 +70,59 @@ def check_and_set_allowance(
     approval_address,
     amount,
     abi,
+    strategy=None,
 ):
+    """
+    Sends an approval if needed and returns its hash without waiting for it.
+    Known allowances come from `allowance_cache`, so repeated swaps of a
+    token skip the on-chain read and, with `bounded_max`, the approval.
+    Call it under `allowance_cache.lock(...)` and keep the lock until the
+    swap has consumed the allowance.
+    """
     zero_address = "0x0000000000000000000000000000000000000000"
     if token_address == zero_address:
         return
 
+    strategy = strategy or APPROVAL_STRATEGY
     contract = web3.eth.contract(address=token_address, abi=abi)
-    current_allowance = contract.functions.allowance(
-        account_address, approval_address
-    ).call()
+    current_allowance = allowance_cache.get(
+        chain, account_address, token_address, approval_address
+    )
+    if current_allowance is None:
+        current_allowance = await contract.functions.allowance(
+            account_address, approval_address
+        ).call()
+        allowance_cache.set(
+            chain, account_address, token_address, approval_address, current_allowance
+        )
 
     if current_allowance < amount:
-        amount_remaining = amount - current_allowance
         chain_id = get_chain_id(chain)
-        nonce = web3.eth.get_transaction_count(account_address)
-        approve_tx = contract.functions.approve(
-            approval_address, amount_remaining
+        # approve() replaces the allowance, so it must cover the whole amount
+        value = approval_amount(strategy, amount, ALLOWANCE_BOUNDED_MULTIPLIER)
+        fees = (await gas_oracle.suggest(chain, GAS_PRESET)).to_tx_params()
+        approve_tx = await contract.functions.approve(
+            approval_address, value
         ).build_transaction(
             {
                 "from": account_address,
                 "chainId": chain_id,
-                "nonce": nonce,
+                **fees,
             }
         )
-        signed_tx = web3.eth.account.sign_transaction(approve_tx, private_key)
-        tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        web3.eth.wait_for_transaction_receipt(tx_hash)
+        tx_hash = await nonce_manager.send_transaction(
+            web3,
+            chain,
+            account_address,
+            lambda nonce: sign_evm_transaction(
+                {**approve_tx, "nonce": nonce}, private_key
+            ),
+        )
+        allowance_cache.set(chain, account_address, token_address, approval_address, value)
+        return tx_hash
 
 
-def execute_swap(
+async def submit_swap(
     starting_chain,
     destination_chain,
     from_token,
@@ -105,10 +130,16 @@ def execute_swap(
     from_amount,
     account_address,
     private_key,
+    on_signed=None,
 ):
-    alchemy_url = alchemy_url_list[starting_chain]
-    web3 = init_web3(alchemy_url)
-    quote = get_quote(
+    """
+    Quotes and broadcasts a swap without waiting for it. Returns the
+    swap and approval transaction hashes (the approval hash is None when
+    the allowance was already sufficient) and the bridge LI.FI picked.
+    `on_signed(nonce, tx_hash)` runs just before the swap is broadcast.
+    """
+    web3 = await get_async_web3(starting_chain)
+    quote = await get_quote(
         starting_chain,
         destination_chain,
         from_token,
@@ -116,34 +147,118 @@ def execute_swap(
         from_amount,
         account_address,
     )
-    check_and_set_allowance(
-        web3,
-        starting_chain,
-        account_address,
-        private_key,
-        quote["action"]["fromToken"]["address"],
-        quote["estimate"]["approvalAddress"],
-        from_amount,
-        erc20_abi,
-    )
-
-    nonce = web3.eth.get_transaction_count(account_address)
-
+    token_address = quote["action"]["fromToken"]["address"]
+    approval_address = quote["estimate"]["approvalAddress"]
+    # Fees come from the oracle: the quote's gasPrice is stale by signing time
+    fees = await gas_oracle.suggest(starting_chain, GAS_PRESET)
     tx = {
         "from": quote["transactionRequest"]["from"],
         "to": quote["transactionRequest"]["to"],
         "value": quote["transactionRequest"]["value"],  # Convert hex to int
         "data": quote["transactionRequest"]["data"],
         "gas": quote["transactionRequest"]["gasLimit"],
-        "gasPrice": quote["transactionRequest"]["gasPrice"],
-        "nonce": nonce,
         "chainId": get_chain_id(starting_chain),
+        **fees.to_tx_params(),
     }
-    signed_tx = web3.eth.account.sign_transaction(tx, private_key)
-    tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-    receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+    # Checking, approving and spending the allowance is one step per token,
+    # so concurrent swaps cannot both count on the same cached allowance
+    async with allowance_cache.lock(
+        starting_chain, account_address, token_address, approval_address
+    ):
+        # The approval is not awaited here: the swap gets the next nonce and
+        # both are sent back to back, then confirmed together in confirm_swap.
+        approve_tx_hash = await check_and_set_allowance(
+            web3,
+            starting_chain,
+            account_address,
+            private_key,
+            token_address,
+            approval_address,
+            from_amount,
+            get_chain_registry().abi("erc20"),
+        )
+        tx_hash = await nonce_manager.send_transaction(
+            web3,
+            starting_chain,
+            account_address,
+            lambda nonce: sign_evm_transaction({**tx, "nonce": nonce}, private_key),
+            on_signed=on_signed,
+        )
+        allowance_cache.consume(
+            starting_chain,
+            account_address,
+            token_address,
+            approval_address,
+            from_amount,
+        )
     print(f"Transaction hash: {tx_hash.hex()}")
-    result = wait_for_transaction_done(tx_hash.hex())
+    return tx_hash, approve_tx_hash, quote.get("tool")
+
+
+async def confirm_swap(
+    starting_chain,
+    account_address,
+    tx_hash,
+    approve_tx_hash=None,
+    destination_chain=None,
+    bridge=None,
+):
+    """
+    Waits for the receipts of a submitted swap, then for LI.FI to report it
+    done. Returns (receipt, True) on success and (receipt, False) on failure.
+    """
+    web3 = await get_async_web3(starting_chain)
+    try:
+        if approve_tx_hash is not None:
+            _, receipt = await asyncio.gather(
+                web3.eth.wait_for_transaction_receipt(approve_tx_hash),
+                web3.eth.wait_for_transaction_receipt(tx_hash),
+            )
+        else:
+            receipt = await web3.eth.wait_for_transaction_receipt(tx_hash)
+    except Exception:
+        # A dropped transaction leaves a gap, so resync before the next send
+        nonce_manager.reset(starting_chain, account_address)
+        allowance_cache.invalidate(starting_chain, account_address)
+        raise
+    if receipt["status"] == 0:
+        # The cached allowance may be why it reverted
+        allowance_cache.invalidate(starting_chain, account_address)
+    tx_hash = tx_hash if isinstance(tx_hash, str) else tx_hash.hex()
+    return receipt, await wait_for_transaction_done(
+        tx_hash,
+        bridge=bridge,
+        starting_chain=starting_chain,
+        destination_chain=destination_chain,
+    )
+
+
+async def execute_swap(
+    starting_chain,
+    destination_chain,
+    from_token,
+    to_token,
+    from_amount,
+    account_address,
+    private_key,
+):
+    tx_hash, approve_tx_hash, bridge = await submit_swap(
+        starting_chain,
+        destination_chain,
+        from_token,
+        to_token,
+        from_amount,
+        account_address,
+        private_key,
+    )
+    receipt, result = await confirm_swap(
+        starting_chain,
+        account_address,
+        tx_hash,
+        approve_tx_hash,
+        destination_chain=destination_chain,
+        bridge=bridge,
+    )
     if result:
         return receipt
     else:
@@ -162,7 +277,39 @@ def execute_swap(
         )
 
 
-def split_send_eth(
+async def find_signed_swap(starting_chain, account_address, tx_hash, nonce):
+    """
+    Tells whether a swap signed before a restart was broadcast: True when
+    the node knows `tx_hash`, False when its nonce is still unused. Raises
+    when another transaction took the nonce, since re-sending could then
+    double the swap.
+    """
+    web3 = await get_async_web3(starting_chain)
+    try:
+        await web3.eth.get_transaction(tx_hash)
+        return True
+    except TransactionNotFound:
+        pass
+    pending = await web3.eth.get_transaction_count(account_address, "pending")
+    if pending > nonce:
+        raise Exception(
+            f"Nonce {nonce} of {tx_hash} was used by another transaction, "
+            "not re-sending."
+        )
+    return False
+
+
+@functools.lru_cache(maxsize=1)
+def get_bridge_orchestrator():
+    return BridgeOrchestrator(
+        submit_swap,
+        confirm_swap,
+        state_path=os.getenv("SPLIT_SEND_STATE_PATH", "split_send_state.json"),
+        find_signed=find_signed_swap,
+    )
+
+
+async def split_send_eth(
     starting_chain,
     destination_chains,
     from_token,
@@ -170,73 +317,145 @@ def split_send_eth(
     from_amount,
     account_address,
     private_key,
+    run_id=None,
 ):
-    split_amount = convert_eth_to_wei(from_amount / len(destination_chains))
+    """
+    Sends one leg per destination chain, all at once. A chain listed twice
+    gets two shares. Returns the BridgeRun with each leg's status and latency.
+    """
+    shares = Counter(destination_chains)
+    amounts = {
+        chain: convert_eth_to_wei(from_amount * count / len(destination_chains))
+        for chain, count in shares.items()
+    }
+    run_id = run_id or f"{starting_chain}-{int(time.time() * 1000)}"
+    return await get_bridge_orchestrator().run(
+        run_id,
+        starting_chain,
+        amounts,
+        from_token,
+        to_token,
+        account_address,
+        private_key,
+    )
 
-    for chain in destination_chains:
-        execute_swap(
-            starting_chain,
-            chain,
-            from_token,
-            to_token,
-            split_amount,
-            account_address,
-            private_key,
-        )
+
+async def resume_split_sends():
+    """Resumes the unfinished split sends left by a previous process."""
+    orchestrator = get_bridge_orchestrator()
+    private_keys = {
+        account["address"].lower(): account["private_key"]
+        for account in get_accounts_from_env()
+    }
+    resumable = []
+    for run in orchestrator.unfinished_runs():
+        private_key = private_keys.get(run.account_address.lower())
+        if private_key is None:
+            print(
+                f"Not resuming split send {run.run_id}: no private key for "
+                f"{run.account_address} in the environment"
+            )
+            continue
+        resumable.append(orchestrator.resume(run.run_id, private_key))
+    return await asyncio.gather(*resumable)
+
+
+def cancel_split_send(run_id):
+    get_bridge_orchestrator().cancel(run_id)
 
 
 # create a function to execute the swap within the same chain (e.g. Ethereum to Ethereum) with ETH as the from token and USDC as the to token
-def execute_swap_ETH_to_USDC(chain, account_address, private_key, amount):
-    receipt = execute_swap(
+async def execute_swap_ETH_to_USDC(chain, account_address, private_key, amount):
+    receipt = await execute_swap(
         chain, chain, "ETH", "USDC", amount, account_address, private_key
     )
     return receipt
 
 
-def execute_swap_all_USDC_to_ETH(chain, account_address, private_key):
-    amount = get_token_balance(chain, account_address, "USDC")
+async def execute_swap_all_USDC_to_ETH(chain, account_address, private_key):
+    amount = await get_token_balance(chain, account_address, "USDC")
     if amount == 0:
         return
-    receipt = execute_swap(
+    receipt = await execute_swap(
         chain, chain, "USDC", "ETH", amount, account_address, private_key
     )
     return receipt
 
 
-def execute_swap_on_same_chain(from_token, to_token, from_amount):
+async def _execute_swap_for_account(
+    account, starting_chain, destination_chain, from_token, to_token, from_amount
+):
+    return await execute_swap(
+        starting_chain,
+        destination_chain,
+        from_token,
+        to_token,
+        from_amount,
+        account["address"],
+        account["private_key"],
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_execution_engine():
+    return ExecutionEngine(
+        get_accounts_from_env(),
+        _execute_swap_for_account,
+        per_account_concurrency=int(os.getenv("EXECUTION_PER_ACCOUNT_CONCURRENCY", 1)),
+    )
+
+
+async def execute_swaps(swaps):
+    """
+    Runs (starting_chain, destination_chain, from_token, to_token,
+    amount_in_wei) swaps across all configured accounts at once.
+    """
+    return await get_execution_engine().run_many(swaps)
+
+
+async def execute_swap_on_same_chain(
+    from_token, to_token, from_amount, account_address=None
+):
     chain = "BASE"
-    accounts = get_accounts_from_env()
-    account_address = accounts[0]["address"]
-    private_key = accounts[0]["private_key"]
     from_amount = convert_eth_to_wei(from_amount)
-    receipt = execute_swap(
-        chain, chain, from_token, to_token, from_amount, account_address, private_key
+    # Runs on the least busy account unless one is named
+    receipt = await get_execution_engine().submit(
+        chain,
+        chain,
+        from_token,
+        to_token,
+        from_amount,
+        account_address=account_address,
     )
     return receipt
 
 
-def get_transaction_status(tx_hash):
-    url = "https://li.quest/v1/status"
-    params = {"txHash": tx_hash}
-    response = requests.get(url, params=params)
-    return response.json()
-
-
-def wait_for_transaction_done(tx_hash):
-    while True:
-        try:
-            status_result = get_transaction_status(tx_hash)
-            if status_result["status"] == "DONE":
-                print("Transaction completed successfully.")
-                return True
-            elif status_result["status"] == "FAILED":
-                print("Transaction failed.")
-                return False
-            else:
-                print(
-                    f"Transaction status: {status_result['status']}. Waiting for completion..."
-                )
-                time.sleep(3)  # Adjusted to wait for 3 seconds as per the comment
-        except Exception as e:
-            print(f"An error occurred: {e}. Retrying...")
-            time.sleep(3)  # wait for 3 seconds before retrying
+async def get_transaction_status(
+    tx_hash, bridge=None, starting_chain=None, destination_chain=None
+):
+    return await lifi_client.get_status(
+        tx_hash,
+        bridge=bridge,
+        from_chain=get_chain_key(starting_chain) if starting_chain else None,
+        to_chain=get_chain_key(destination_chain) if destination_chain else None,
+    )
+
+
+async def wait_for_transaction_done(
+    tx_hash, bridge=None, starting_chain=None, destination_chain=None
+):
+    """
+    Waits on the shared bridge watcher. Returns True when LI.FI reports the
+    transfer done and raises asyncio.TimeoutError past the deadline.
+    """
+    status_result = await bridge_watcher.watch(
+        tx_hash,
+        bridge=bridge,
+        from_chain=get_chain_key(starting_chain) if starting_chain else None,
+        to_chain=get_chain_key(destination_chain) if destination_chain else None,
+    )
+    if status_result["status"] == "DONE":
+        print("Transaction completed successfully.")
+        return True
+    print(f"Transaction {status_result['status'].lower()}.")
+    return False
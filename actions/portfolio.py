@@ -0,0 +1,188 @@
+import asyncio
+import random
+
+from solders.pubkey import Pubkey
+
+from solana.rpc.commitment import Confirmed
+from solana.rpc.types import MemcmpOpts
+from solana.rpc.websocket_api import connect
+
+from actions.valuation import SOL_MINT
+
+TOKEN_PROGRAM_IDS = [
+    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+    "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb",
+]
+# Owner field offset inside an SPL token account
+TOKEN_ACCOUNT_OWNER_OFFSET = 32
+
+
+def _parse_token_account(account):
+    """Returns (mint, amount) from a jsonParsed token account, or None if closed."""
+    try:
+        info = account.data.parsed["info"]
+        return info["mint"], int(info["tokenAmount"]["amount"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class PortfolioTracker:
+    """
+    In-memory view of one wallet's balances, kept current by websocket
+    subscriptions: `accountSubscribe` on the wallet for native SOL and
+    `programSubscribe` on the token programs, filtered by owner, for SPL
+    token accounts.
+
+    A full resync through `resync` (an async function that returns a Helius
+    balances payload) runs on every (re)connect. While the subscription is
+    down `synced` is False and callers should use their regular fetch path.
+    `connect` can be replaced by a mock websocket stand-in for tests, or
+    `ws_url` pointed at a local test validator.
+    """
+
+    def __init__(
+        self,
+        owner,
+        ws_url,
+        resync,
+        connect=connect,
+        commitment=Confirmed,
+        max_reconnect_delay=30,
+    ):
+        self.owner = owner
+        self.ws_url = ws_url
+        self.resync_balances = resync
+        self.connect = connect
+        self.commitment = commitment
+        self.max_reconnect_delay = max_reconnect_delay
+        self.synced = False
+        self.resyncs = 0
+        self._token_accounts = {}
+        # SPL token balances per mint; wrapped SOL accounts count under SOL_MINT
+        self._balances = {}
+        # Native lamports, kept apart from wrapped SOL like the Helius payload
+        self._native_balance = 0
+        # Deltas of our own swaps, until the account update for the mint lands
+        self._pending = {}
+        self._snapshot = None
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self.synced = False
+
+    def snapshot(self):
+        """Balances as [{"mint", "amount"}] with SOL last, like `get_assets_by_owner`."""
+        if self._snapshot is None:
+            amounts = dict(self._balances)
+            # Swaps wrap and unwrap SOL, so a SOL delta applies to the native balance
+            native_balance = self._native_balance + self._pending.get(SOL_MINT, 0)
+            for mint, delta in self._pending.items():
+                if mint != SOL_MINT:
+                    amounts[mint] = amounts.get(mint, 0) + delta
+            tokens = [
+                {"mint": mint, "amount": amount}
+                for mint, amount in amounts.items()
+                if amount > 0
+            ]
+            tokens.append({"mint": SOL_MINT, "amount": native_balance})
+            self._snapshot = tokens
+        return self._snapshot
+
+    def apply_swap(self, input_mint, input_amount, output_mint, output_amount):
+        """Books a confirmed swap of ours before the account notifications arrive."""
+        self._pending[input_mint] = self._pending.get(input_mint, 0) - int(
+            input_amount
+        )
+        self._pending[output_mint] = self._pending.get(output_mint, 0) + int(
+            output_amount
+        )
+        self._snapshot = None
+
+    def _set_token_account(self, token_account, mint, amount):
+        _, previous = self._token_accounts.get(token_account, (mint, 0))
+        self._token_accounts[token_account] = (mint, amount)
+        self._balances[mint] = self._balances.get(mint, 0) + amount - previous
+        if mint != SOL_MINT:
+            self._pending.pop(mint, None)
+        self._snapshot = None
+
+    def _set_native_balance(self, lamports):
+        self._native_balance = lamports
+        self._pending.pop(SOL_MINT, None)
+        self._snapshot = None
+
+    async def resync(self):
+        assets = await self.resync_balances(self.owner)
+        self._token_accounts = {}
+        self._balances = {}
+        self._native_balance = 0
+        self._pending = {}
+        for token in assets["tokens"]:
+            account = token.get("tokenAccount") or token["mint"]
+            self._set_token_account(account, token["mint"], int(token["amount"]))
+        self._set_native_balance(int(assets["nativeBalance"]))
+        self.resyncs += 1
+
+    def _apply_notification(self, notification):
+        value = getattr(getattr(notification, "result", None), "value", None)
+        if value is None:
+            return
+        if hasattr(value, "pubkey"):
+            parsed = _parse_token_account(value.account)
+            token_account = str(value.pubkey)
+            if parsed is None:
+                # Closed account: drop whatever it held
+                mint, _ = self._token_accounts.get(token_account, (None, 0))
+                if mint is not None:
+                    self._set_token_account(token_account, mint, 0)
+            else:
+                self._set_token_account(token_account, *parsed)
+        elif hasattr(value, "lamports"):
+            self._set_native_balance(value.lamports)
+
+    async def _subscribe(self, websocket):
+        owner = Pubkey.from_string(self.owner)
+        await websocket.account_subscribe(owner, commitment=self.commitment)
+        for program_id in TOKEN_PROGRAM_IDS:
+            await websocket.program_subscribe(
+                Pubkey.from_string(program_id),
+                commitment=self.commitment,
+                encoding="jsonParsed",
+                filters=[
+                    MemcmpOpts(offset=TOKEN_ACCOUNT_OWNER_OFFSET, bytes=self.owner)
+                ],
+            )
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                async with self.connect(self.ws_url) as websocket:
+                    await self._subscribe(websocket)
+                    # Subscribe first so no update slips in between resync and stream
+                    await self.resync()
+                    self.synced = True
+                    failures = 0
+                    async for messages in websocket:
+                        for notification in messages:
+                            self._apply_notification(notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Portfolio subscription for {self.owner} dropped: {e}")
+            self.synced = False
+            delay = min(self.max_reconnect_delay, 2**failures)
+            failures += 1
+            await asyncio.sleep(random.uniform(delay / 2, delay))
@@ -0,0 +1,71 @@
+from ttl_cache import TTLCache
+
+
+def amount_bucket(amount, significant_digits):
+    """Rounds `amount` to `significant_digits` so near-identical sizes share quotes."""
+    amount = int(amount)
+    if significant_digits is None or amount == 0:
+        return amount
+    scale = 10 ** max(len(str(abs(amount))) - significant_digits, 0)
+    return round(amount / scale) * scale
+
+
+class QuoteCache:
+    """
+    Short-lived cache of Jupiter quotes keyed by
+    (input mint, output mint, amount bucket, slippage).
+
+    Valuation accepts any quote from the same bucket. Swap execution asks
+    for an `exact` quote, i.e. one computed for the very same input amount,
+    and can bound its age further with `max_age`.
+    """
+
+    def __init__(self, ttl=2.0, maxsize=512, significant_digits=3):
+        self.significant_digits = significant_digits
+        self._cache = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def key(self, input_mint, output_mint, amount, slippage):
+        return (
+            input_mint,
+            output_mint,
+            amount_bucket(amount, self.significant_digits),
+            slippage,
+        )
+
+    def get(self, input_mint, output_mint, amount, slippage, exact=False, max_age=None):
+        accept = None
+        if exact:
+            accept = lambda quote: int(quote["inAmount"]) == int(amount)
+        return self._cache.get(
+            self.key(input_mint, output_mint, amount, slippage),
+            max_age=max_age,
+            accept=accept,
+        )
+
+    def set(self, input_mint, output_mint, amount, slippage, quote):
+        self._cache.set(self.key(input_mint, output_mint, amount, slippage), quote)
+
+    async def get_or_fetch(
+        self,
+        fetch,
+        input_mint,
+        output_mint,
+        amount,
+        slippage,
+        exact=False,
+        max_age=None,
+    ):
+        quote = self.get(input_mint, output_mint, amount, slippage, exact, max_age)
+        if quote is None:
+            quote = await fetch(input_mint, output_mint, amount, slippage)
+            self.set(input_mint, output_mint, amount, slippage, quote)
+        return quote
+
+    def invalidate(self, mint=None):
+        if mint is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate(lambda key: mint in key[:2])
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,81 @@
+import re
+
+from solana.rpc.commitment import Processed
+
+# Patterns in errors and program logs that re-quoting cannot fix
+FATAL_SIMULATION_PATTERNS = [
+    re.compile(pattern)
+    for pattern in [
+        r"insufficient (funds|lamports)",
+        r"custom program error: 0x1\b|custom\(1\)",  # SPL token: insufficient funds
+        r"invalidaccountdata|accountnotfound|incorrectprogramid",
+        r"invalid mint",
+    ]
+]
+# Errors caused by timing, where a fresh quote and blockhash may succeed
+RETRYABLE_SIMULATION_PATTERNS = [
+    re.compile(pattern)
+    for pattern in [
+        r"blockhash ?not ?found",
+        # Jupiter slippage: the price moved since the quote, a new one resets it
+        r"custom program error: 0x1771\b|custom\(6001\)",
+        r"alreadyprocessed|accountinuse|wouldexceed",
+    ]
+]
+
+
+class SimulationResult:
+    __slots__ = ("err", "logs", "units_consumed", "retryable")
+
+    def __init__(self, err=None, logs=None, units_consumed=None, retryable=False):
+        self.err = err
+        self.logs = logs or []
+        self.units_consumed = units_consumed
+        self.retryable = retryable
+
+    @property
+    def ok(self):
+        return self.err is None
+
+    @property
+    def fatal(self):
+        return not self.ok and not self.retryable
+
+    def describe(self):
+        if self.ok:
+            return f"simulation ok, {self.units_consumed} compute units"
+        # The last program log usually names the failing check
+        last_log = self.logs[-1] if self.logs else ""
+        return f"{self.err} {last_log}".strip()
+
+
+def classify_simulation_error(err, logs):
+    """Returns True when a failed simulation is worth retrying."""
+    text = " ".join([str(err)] + list(logs)).lower()
+    if any(pattern.search(text) for pattern in FATAL_SIMULATION_PATTERNS):
+        return False
+    if any(pattern.search(text) for pattern in RETRYABLE_SIMULATION_PATTERNS):
+        return True
+    # Unknown program errors are deterministic for a given route
+    return False
+
+
+async def simulate_transaction(client, transaction, commitment=Processed):
+    """
+    Runs `simulateTransaction` for a signed solders VersionedTransaction on
+    `client` (an AsyncClient or any mock with the same method) and classifies
+    the outcome.
+    """
+    response = await client.simulate_transaction(
+        transaction, sig_verify=False, commitment=commitment
+    )
+    value = response.value
+    logs = list(value.logs or [])
+    if value.err is None:
+        return SimulationResult(logs=logs, units_consumed=value.units_consumed)
+    return SimulationResult(
+        err=value.err,
+        logs=logs,
+        units_consumed=value.units_consumed,
+        retryable=classify_simulation_error(value.err, logs),
+    )
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+
+def normalize_token_key(value):
+    # Lookups are case and whitespace insensitive ("usd coin" == "USDCoin")
+    return "".join(value.lower().split())
+
+
+class TokenIndex:
+    """
+    Immutable snapshot of one Jupiter token list with hash indexes by mint,
+    symbol and normalized name.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.loaded_at = time.monotonic()
+        self.by_mint = {}
+        self.by_symbol = {}
+        self.by_name = {}
+        for token in tokens:
+            # Keep the first occurrence so results match the list ordering
+            self.by_mint.setdefault(token["address"], token)
+            symbol = token.get("symbol")
+            if symbol:
+                self.by_symbol.setdefault(normalize_token_key(symbol), token)
+            name = token.get("name")
+            if name:
+                self.by_name.setdefault(normalize_token_key(name), token)
+
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+    def find(self, token_name_or_symbol):
+        key = normalize_token_key(token_name_or_symbol)
+        # Symbols first: any token can be named "USDC", but the real USDC
+        # is the first one listed with that symbol
+        return (
+            self.by_symbol.get(key)
+            or self.by_name.get(key)
+            or self.by_mint.get(token_name_or_symbol.strip())
+        )
+
+
+class TokenRegistry:
+    """
+    Process-wide cache of Jupiter token lists.
+
+    Each list type is downloaded once and indexed. Once a snapshot is older
+    than `ttl` seconds it keeps being served while a single background task
+    downloads a fresh copy.
+    """
+
+    def __init__(self, fetch_tokens, ttl=3600):
+        self.fetch_tokens = fetch_tokens
+        self.ttl = ttl
+        self._indexes = {}
+        self._locks = {}
+        self._refresh_tasks = {}
+
+    async def _load(self, list_type):
+        tokens = await self.fetch_tokens(list_type)
+        index = TokenIndex(tokens)
+        self._indexes[list_type] = index
+        return index
+
+    def _schedule_refresh(self, list_type):
+        task = self._refresh_tasks.get(list_type)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._load(list_type))
+        task.add_done_callback(self._log_refresh_failure)
+        self._refresh_tasks[list_type] = task
+
+    @staticmethod
+    def _log_refresh_failure(task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Token list refresh failed: {task.exception()}")
+
+    async def get_index(self, list_type="all"):
+        index = self._indexes.get(list_type)
+        if index is None:
+            lock = self._locks.setdefault(list_type, asyncio.Lock())
+            async with lock:
+                index = self._indexes.get(list_type)
+                if index is None:
+                    index = await self._load(list_type)
+        elif index.age() > self.ttl:
+            self._schedule_refresh(list_type)
+        return index
+
+    async def get_tokens(self, list_type="all"):
+        index = await self.get_index(list_type)
+        return index.tokens
+
+    async def find(self, token_name_or_symbol, list_type="all"):
+        index = await self.get_index(list_type)
+        return index.find(token_name_or_symbol)
+
+    async def get_by_mint(self, mint, list_type="all"):
+        index = await self.get_index(list_type)
+        return index.by_mint.get(mint)
+
+    async def refresh(self, list_type="all"):
+        return await self._load(list_type)
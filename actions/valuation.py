@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+LAMPORTS_PER_SOL = 1000000000
+
+
+class TokenValuation:
+    __slots__ = ("mint", "amount", "sol_value", "error", "elapsed_ms")
+
+    def __init__(self, mint, amount, sol_value=None, error=None, elapsed_ms=0.0):
+        self.mint = mint
+        self.amount = amount
+        self.sol_value = sol_value
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ValuationReport:
+    def __init__(self, valuations, elapsed_ms):
+        self.valuations = valuations
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def failed(self):
+        return [valuation for valuation in self.valuations if not valuation.ok]
+
+    @property
+    def total_sol_value(self):
+        return sum(valuation.sol_value for valuation in self.valuations if valuation.ok)
+
+    def slowest(self, count=5):
+        return sorted(self.valuations, key=lambda v: v.elapsed_ms, reverse=True)[
+            :count
+        ]
+
+
+class ValuationEngine:
+    """
+    Values token holdings in SOL by quoting every mint against SOL
+    concurrently. At most `concurrency` quotes are in flight and every quote
+    goes through `limiter` (shared per host). A failed quote is reported on
+    its own valuation instead of failing, or zeroing, the whole wallet.
+    """
+
+    def __init__(self, quote, concurrency=8, limiter=None, slow_quote_ms=2000):
+        self.quote = quote
+        self.concurrency = concurrency
+        self.limiter = limiter
+        self.slow_quote_ms = slow_quote_ms
+
+    async def _value_token(self, semaphore, mint, amount):
+        if mint == SOL_MINT:
+            return TokenValuation(mint, amount, amount / LAMPORTS_PER_SOL)
+
+        async with semaphore:
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                quote = await self.quote(mint, SOL_MINT, int(amount))
+                sol_value = int(quote["outAmount"]) / LAMPORTS_PER_SOL
+                error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                sol_value = None
+                error = str(e) or type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if elapsed_ms > self.slow_quote_ms:
+            print(f"Slow SOL quote for {mint}: {elapsed_ms:.0f} ms")
+        return TokenValuation(mint, amount, sol_value, error, elapsed_ms)
+
+    async def value(self, holdings):
+        """`holdings` is an iterable of (mint, amount) pairs in smallest units."""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        valuations = await asyncio.gather(
+            *[
+                self._value_token(semaphore, mint, amount)
+                for mint, amount in holdings
+            ]
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return ValuationReport(list(valuations), elapsed_ms)
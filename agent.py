@@ -1,26 +1,27 @@
 import json
 import asyncio
-import random
-import string
+import functools
+import os
 
 from datetime import date
 
 from typing import Dict
 from fastapi import WebSocket
 
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play, save
-
 
 from typing import List, Tuple
 from langchain.agents import AgentExecutor
 from langchain.agents.format_scratchpad import format_to_openai_function_messages
 from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.utils.function_calling import convert_to_openai_function
 from langchain_openai import ChatOpenAI
+from chat_memory import ConversationMemory, llm_summarizer, load_encoding
+from stream_queue import CoalescingSendQueue
+from tool_memo import tool_run
+from tts import get_tts_pipeline
 from tools import (
     execute_swap_tool,
     get_wallet_balance_tool,
@@ -31,107 +32,59 @@ from tools import (
     tavily_search,
 )
 
+AGENT_TOOLS = [
+    execute_swap_tool,
+    get_wallet_balance_tool,
+    get_wallet_balance_in_sol_values_tool,
+    # navigate_url_tool,
+    # trending_coins_tool,
+    get_token_info_tool,
+    tavily_search,
+]
 
-class AvatarAgent:
-    def __init__(self):
-        self.websocket = None
-        self.prompt = None
-        self.llm = None
-        self.llm_with_tools = None
-        self.agent = None
-        self.agent_executor = None
-        self.eleven_labs = ElevenLabs()
-
-    def _generate_audio(self, text: str):
-        audio = self.eleven_labs.generate(
-            text=text, voice="Rachel", model="eleven_monolingual_v1"
-        )
-        random_string = "".join(
-            random.choices(string.ascii_lowercase + string.digits, k=8)
-        )
-        save(audio, "audio/" + random_string + ".mp3")
-        return f"http://localhost:8000/audio/{random_string}.mp3"
-
-    def _format_chat_history(self, chat_history: List[Tuple[str, str]]):
-        buffer = []
-        for human, ai in chat_history:
-            buffer.append(HumanMessage(content=human))
-            buffer.append(AIMessage(content=ai))
-        return buffer
-
-    def set_websocket(self, websocket: WebSocket):
-        self.websocket = websocket
 
-    async def process_message(
-        self, user_message: str, chat_history: List[Tuple[str, str]]
-    ):
-        chat_history.append((user_message, ""))
-        return chat_history
+def format_chat_history(chat_history):
+    """Accepts (human, ai) tuples or messages already built by ConversationMemory."""
+    buffer = []
+    for entry in chat_history:
+        if isinstance(entry, BaseMessage):
+            buffer.append(entry)
+            continue
+        human, ai = entry
+        buffer.append(HumanMessage(content=human))
+        buffer.append(AIMessage(content=ai))
+    return buffer
 
-    async def invoke(self, input_text: str, chat_history: List[Tuple[str, str]]):
-        return await self.agent_executor.ainvoke(
-            {"input": input_text, "chat_history": chat_history}
-        )
 
-    async def stream(self, input_text: str, chat_history: List[Tuple[str, str]]):
-        async for chunk in self.agent_executor.astream(
-            {"input": input_text, "chat_history": chat_history}
-        ):
-            actions = chunk.get("actions", [])
-            messages = chunk.get("messages", [])
-            steps = chunk.get("steps", [])
-            output = chunk.get("output", "")
-            audio = ""
-
-            print("actions", actions)
-            print("messages", messages)
-            print("steps", steps)
-            print("output", output)
-
-            # stringified actions and messages and steps to send to the frontend
-            actions_str = json.dumps([action.json() for action in actions])
-            messages_str = json.dumps([message.json() for message in messages])
-            steps_str = json.dumps([step.json() for step in steps])
-
-            # if output and len(output) > 0:
-            #     audio = self._generate_audio(output)
-
-            if self.websocket:
-                await self.websocket.send_json(
-                    {
-                        "type": "internal_thought",
-                        "action": actions_str,
-                        "messages": messages_str,
-                        "steps": steps_str,
-                        "output": output,
-                        "audio": audio,
-                    }
-                )
+@functools.lru_cache(maxsize=1)
+def get_llm_with_tools():
+    """The model and its tool schemas are the same for every avatar."""
+    llm = ChatOpenAI(model="gpt-4-turbo-preview", temperature=0, streaming=True)
+    return llm, llm.bind(functions=[convert_to_openai_function(t) for t in AGENT_TOOLS])
 
-    async def start(self, name: str):
-        with open(f"avatars/{name}/prompts/system.txt", "r") as file:
-            assistant_system_message = file.read()
 
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview", temperature=0, streaming=True
-        )
+class AvatarTemplate:
+    """
+    Everything about an avatar that does not depend on the session: its
+    system prompt and the compiled agent and executor. Executors keep no
+    state between calls, so one template serves every connection.
+    """
 
-        tools = [
-            execute_swap_tool,
-            get_wallet_balance_tool,
-            get_wallet_balance_in_sol_values_tool,
-            # navigate_url_tool,
-            # trending_coins_tool,
-            get_token_info_tool,
-            tavily_search,
-        ]
-        self.llm_with_tools = self.llm.bind(
-            functions=[convert_to_openai_function(t) for t in tools]
+    def __init__(self, name: str, system_message: str):
+        self.name = name
+        self.system_message = system_message
+        self.llm, self.llm_with_tools = get_llm_with_tools()
+        # Token budget of the chat history sent with every turn
+        self.history_max_tokens = int(
+            os.getenv(
+                f"{name.upper()}_CHAT_HISTORY_MAX_TOKENS",
+                os.getenv("CHAT_HISTORY_MAX_TOKENS", 3000),
+            )
         )
 
         self.prompt = ChatPromptTemplate.from_messages(
             [
-                ("system", assistant_system_message),
+                ("system", system_message),
                 MessagesPlaceholder(variable_name="chat_history"),
                 ("user", "{input}"),
                 MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -142,7 +95,7 @@ class AvatarAgent:
         self.agent = (
             {
                 "input": lambda x: x["input"],
-                "chat_history": lambda x: self._format_chat_history(x["chat_history"]),
+                "chat_history": lambda x: format_chat_history(x["chat_history"]),
                 "agent_scratchpad": lambda x: format_to_openai_function_messages(
                     x["intermediate_steps"]
                 ),
@@ -154,9 +107,156 @@ class AvatarAgent:
 
         # Define the agent executor
         self.agent_executor = AgentExecutor(
-            agent=self.agent, tools=tools, return_intermediate_steps=True
+            agent=self.agent, tools=AGENT_TOOLS, return_intermediate_steps=True
         ).with_types(input_type=AgentInput)
 
+
+@functools.lru_cache(maxsize=32)
+def _build_avatar_template(name: str, modified_at: float):
+    with open(f"avatars/{name}/prompts/system.txt", "r") as file:
+        return AvatarTemplate(name, file.read())
+
+
+def get_avatar_template(name: str):
+    """Built once per avatar; editing its system.txt rebuilds it."""
+    modified_at = os.path.getmtime(f"avatars/{name}/prompts/system.txt")
+    return _build_avatar_template(name, modified_at)
+
+
+class AvatarAgent:
+    def __init__(self):
+        self.websocket = None
+        self.template = None
+        self.prompt = None
+        self.llm = None
+        self.llm_with_tools = None
+        self.agent = None
+        self.agent_executor = None
+        self.memory = None
+        # Off by default: every spoken answer is a paid synthesis request
+        self.speak = os.getenv("AGENT_TTS", "0") == "1"
+
+    def _format_chat_history(self, chat_history: List[Tuple[str, str]]):
+        return format_chat_history(chat_history)
+
+    def set_websocket(self, websocket: WebSocket):
+        self.websocket = websocket
+
+    async def process_message(
+        self, user_message: str, chat_history: List[Tuple[str, str]]
+    ):
+        chat_history.append((user_message, ""))
+        return chat_history
+
+    def _history(self, chat_history):
+        if chat_history is not None:
+            return chat_history
+        return self.memory.messages() if self.memory is not None else []
+
+    def _remember(self, chat_history, input_text, output, tool_outputs=()):
+        # Callers passing their own history keep managing it themselves
+        if chat_history is None and self.memory is not None:
+            self.memory.add_turn(input_text, output, tool_outputs)
+
+    async def invoke(self, input_text: str, chat_history=None):
+        with tool_run():
+            result = await self.agent_executor.ainvoke(
+                {"input": input_text, "chat_history": self._history(chat_history)}
+            )
+        self._remember(
+            chat_history,
+            input_text,
+            result.get("output", ""),
+            [
+                (action.tool, observation)
+                for action, observation in result.get("intermediate_steps", [])
+            ],
+        )
+        return result
+
+    async def _emit(self, queue, frame):
+        if queue is not None:
+            await queue.put(frame)
+
+    async def stream(self, input_text: str, chat_history=None):
+        # Read-only tool results are shared within this run
+        with tool_run():
+            return await self._stream(input_text, chat_history)
+
+    async def _stream(self, input_text: str, chat_history=None):
+        """
+        Pushes LLM tokens and tool calls to the websocket as they happen:
+        `token`, `tool_start` and `tool_end` frames, then one `output`
+        frame with the final answer, which is also returned. Without an
+        explicit `chat_history` the session's memory is used and updated.
+        """
+        queue = CoalescingSendQueue(self.websocket.send_json) if self.websocket else None
+        output = ""
+        tool_outputs = []
+        try:
+            async for event in self.agent_executor.astream_events(
+                {"input": input_text, "chat_history": self._history(chat_history)},
+                version="v1",
+            ):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        await self._emit(queue, {"type": "token", "text": text})
+                elif kind == "on_tool_start":
+                    await self._emit(
+                        queue,
+                        {
+                            "type": "tool_start",
+                            "id": event["run_id"],
+                            "tool": event["name"],
+                            "input": _jsonable(event["data"].get("input")),
+                        },
+                    )
+                elif kind == "on_tool_end":
+                    tool_outputs.append((event["name"], event["data"].get("output")))
+                    await self._emit(
+                        queue,
+                        {
+                            "type": "tool_end",
+                            "id": event["run_id"],
+                            "tool": event["name"],
+                            "output": _jsonable(event["data"].get("output")),
+                        },
+                    )
+                elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                    result = event["data"].get("output")
+                    if isinstance(result, dict) and "output" in result:
+                        output = result["output"]
+
+            await self._emit(queue, {"type": "output", "output": output})
+            if queue is not None and output and self.speak:
+                # Sentences are spoken and streamed as they are synthesized
+                await get_tts_pipeline().stream(output, queue.put)
+        except BaseException:
+            if queue is not None:
+                queue.abort()
+            raise
+        if queue is not None:
+            await queue.close()
+        self._remember(chat_history, input_text, output, tool_outputs)
+        return output
+
+    async def start(self, name: str):
+        # Only the session state lives on the agent; the rest is shared
+        self.template = get_avatar_template(name)
+        self.prompt = self.template.prompt
+        self.llm = self.template.llm
+        self.llm_with_tools = self.template.llm_with_tools
+        self.agent = self.template.agent
+        self.agent_executor = self.template.agent_executor
+        # Token counting runs on the loop, so load the tokenizer off it first
+        await load_encoding()
+        self.memory = ConversationMemory(
+            max_tokens=self.template.history_max_tokens,
+            summarize=llm_summarizer(self.template.llm),
+        )
+
         today = date.today()
         user_input = """Be concise and start trading. 
 		Remember that today is {today}.
@@ -164,7 +264,16 @@ class AvatarAgent:
 		Search online for info to help you make the best trades based on your personality. 
 		When trading SOL always use at max 0.1 SOL."""
         # user_input = "Tell me a joke"
-        return await self.stream(user_input, [])
+        return await self.stream(user_input)
+
+
+def _jsonable(value):
+    """Tool inputs and outputs go out as JSON when they can, else as text."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
 
 
 class AgentInput(BaseModel):
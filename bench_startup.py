@@ -0,0 +1,79 @@
+"""
+Cold-import benchmark for the websocket server.
+
+Imports `endpoint` in fresh interpreters and exits non-zero when the median
+import time exceeds the budget, or when a module that should only load on
+first use (browser automation, EVM stack) was imported at startup.
+
+    python bench_startup.py [--runs 5] [--budget 4.0]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that must stay out of the import graph of `endpoint`
+LAZY_MODULES = ["seleniumbase", "actions.vision", "actions.lify", "web3"]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import endpoint
+elapsed = time.perf_counter() - started
+loaded = [name for name in {lazy!r} if name in sys.modules]
+print(elapsed)
+print(",".join(loaded))
+"""
+
+
+def measure_once():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(lazy=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing endpoint failed:\n{result.stderr}")
+    elapsed, loaded = result.stdout.splitlines()[-2:]
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_SECONDS", 4.0)),
+        help="maximum median cold import time in seconds",
+    )
+    args = parser.parse_args()
+
+    timings = []
+    eager_modules = set()
+    for _ in range(args.runs):
+        elapsed, loaded = measure_once()
+        timings.append(elapsed)
+        eager_modules.update(loaded)
+
+    median = statistics.median(timings)
+    print(
+        f"endpoint cold import: median {median:.3f}s, "
+        f"min {min(timings):.3f}s, max {max(timings):.3f}s over {args.runs} runs"
+    )
+
+    failed = False
+    if median > args.budget:
+        print(f"FAIL: median exceeds the {args.budget:.2f}s budget")
+        failed = True
+    if eager_modules:
+        print(f"FAIL: imported at startup: {', '.join(sorted(eager_modules))}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import json
+import os
+from types import MappingProxyType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ABI_FILES = {
+    "hNFT": "abi/hNFT-abi.json",
+    "hFT": "abi/hFT-abi.json",
+    "erc20": "abi/lifi-erc20-abi.json",
+}
+
+
+def _read_json(path):
+    with open(os.path.join(BASE_DIR, path), "r") as file:
+        return json.load(file)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ChainRegistry:
+    """
+    Read-only view of the chain, contract address, domain and ABI files,
+    parsed once and indexed. Chains can be found by lowercase name, LI.FI
+    key or chain id.
+    """
+
+    def __init__(self, chains, hnft_addresses, hft_addresses, domains, abis):
+        self.chains = _freeze(chains)
+        self.hnft_addresses = _freeze(hnft_addresses)
+        self.hft_addresses = _freeze(hft_addresses)
+        self.domains = _freeze(domains)
+        self.abis = _freeze(abis)
+        self.chains_by_name = MappingProxyType(
+            {chain["name"].lower(): chain for chain in self.chains}
+        )
+        self.chains_by_key = MappingProxyType(
+            {chain["key"]: chain for chain in self.chains}
+        )
+        self.chains_by_id = MappingProxyType(
+            {chain["id"]: chain for chain in self.chains}
+        )
+
+    @classmethod
+    def load(cls):
+        return cls(
+            chains=_read_json("lifi-chains.json"),
+            hnft_addresses=_read_json("hNFT-addresses.json"),
+            hft_addresses=_read_json("hft-addresses.json"),
+            domains=_read_json("domains.json"),
+            abis={name: _read_json(path) for name, path in ABI_FILES.items()},
+        )
+
+    def chain(self, chain_name):
+        return self.chains_by_name.get(chain_name.lower())
+
+    def chain_key(self, chain_name):
+        chain = self.chain(chain_name)
+        return chain["key"] if chain is not None else None
+
+    def chain_id(self, chain_name):
+        chain = self.chain(chain_name)
+        return chain["id"] if chain is not None else None
+
+    def abi(self, name):
+        return self.abis[name]
+
+
+_registry = None
+
+
+def get_chain_registry():
+    global _registry
+    if _registry is None:
+        _registry = ChainRegistry.load()
+    return _registry
+
+
+def reload_chain_registry():
+    """Re-reads the files; callers holding the old registry keep a consistent copy."""
+    global _registry
+    _registry = ChainRegistry.load()
+    return _registry
@@ -0,0 +1,174 @@
+import asyncio
+import functools
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+SUMMARY_PROMPT = (
+    "You keep the running memory of a trading assistant's conversation. "
+    "Merge the earlier summary and the new turns into one short summary. "
+    "Keep trades executed, balances, tokens discussed, user preferences and "
+    "open tasks; drop small talk. Answer with the summary only."
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+async def load_encoding():
+    """Loads the tokenizer in a thread; the first load may download it."""
+    await asyncio.to_thread(_get_encoding)
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        # Rough average for English text
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def condense_tool_output(output, max_chars=300, max_items=5):
+    """
+    Shortens a tool result before it is stored in the history. JSON lists
+    keep their first `max_items` entries and a count; anything still
+    longer than `max_chars` is cut.
+    """
+    if isinstance(output, str):
+        try:
+            output = json.loads(output)
+        except ValueError:
+            pass
+    if isinstance(output, dict):
+        # Wallet responses wrap the list, e.g. {"tokens": [...]}
+        output = {
+            key: (value[:max_items] + [f"... {len(value) - max_items} more"])
+            if isinstance(value, list) and len(value) > max_items
+            else value
+            for key, value in output.items()
+        }
+    elif isinstance(output, list) and len(output) > max_items:
+        output = output[:max_items] + [f"... {len(output) - max_items} more"]
+    text = output if isinstance(output, str) else json.dumps(output, default=str)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return text
+
+
+class Turn:
+    __slots__ = ("messages", "tokens")
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.tokens = sum(count_tokens(message.content) for message in messages)
+
+
+class ConversationMemory:
+    """
+    Chat history for one session, kept as ready-made messages within a
+    token budget.
+
+    Each turn is formatted and counted once when it is added. Once the
+    turns exceed `max_tokens`, the oldest ones (all but `keep_turns`) are
+    folded into a running summary by `summarize(previous_summary, text)`
+    in a background task. Until the summary is ready the folded turns stay
+    in the history, so nothing is lost while it is written.
+    """
+
+    def __init__(self, max_tokens=3000, summarize=None, keep_turns=2):
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.summary = ""
+        self.summaries = 0
+        self._turns = []
+        self._summary_message = None
+        self._task = None
+
+    @property
+    def tokens(self):
+        summary_tokens = count_tokens(self.summary) if self.summary else 0
+        return summary_tokens + sum(turn.tokens for turn in self._turns)
+
+    def messages(self):
+        messages = [self._summary_message] if self._summary_message else []
+        for turn in self._turns:
+            messages.extend(turn.messages)
+        return messages
+
+    def add_turn(self, human, ai, tool_outputs=()):
+        """`tool_outputs` is a list of (tool_name, output) from the turn."""
+        if tool_outputs:
+            notes = "\n".join(
+                f"[{tool}] {condense_tool_output(output)}"
+                for tool, output in tool_outputs
+            )
+            ai = f"{notes}\n{ai}" if ai else notes
+        self._turns.append(Turn([HumanMessage(content=human), AIMessage(content=ai)]))
+        self._maybe_fold()
+
+    def _maybe_fold(self):
+        if self.tokens <= self.max_tokens or len(self._turns) <= self.keep_turns:
+            return
+        if self._task is not None and not self._task.done():
+            return
+        if self.summarize is None:
+            # Without a summarizer the oldest turns are simply dropped
+            self._drop_oldest()
+            return
+        folded = self._turns[: len(self._turns) - self.keep_turns]
+        self._task = asyncio.create_task(self._fold(folded))
+
+    def _drop_oldest(self):
+        while self.tokens > self.max_tokens and len(self._turns) > self.keep_turns:
+            self._turns.pop(0)
+
+    async def _fold(self, folded):
+        text = "\n".join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: "
+            f"{message.content}"
+            for turn in folded
+            for message in turn.messages
+        )
+        try:
+            summary = await self.summarize(self.summary, text)
+        except Exception as e:
+            print(f"Chat history summarization failed: {e}")
+            # Stay within the budget anyway, as without a summarizer
+            self._drop_oldest()
+            self._task = None
+            return
+        self.summary = summary
+        self.summaries += 1
+        self._summary_message = SystemMessage(
+            content=f"Summary of the earlier conversation: {summary}"
+        )
+        self._turns = [turn for turn in self._turns if turn not in folded]
+        # New turns may have arrived while summarizing
+        self._task = None
+        self._maybe_fold()
+
+    async def wait(self):
+        """Waits until no summarization is running."""
+        while self._task is not None and not self._task.done():
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def llm_summarizer(llm):
+    """Builds a `summarize` callable for ConversationMemory from a chat model."""
+
+    async def summarize(previous_summary, text):
+        content = f"Earlier summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{text}"
+        response = await llm.ainvoke(
+            [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=content)]
+        )
+        return response.content
+
+    return summarize
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, HTTPException, WebSocket
@@ -5,6 +6,7 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Tuple
 from agent import AvatarAgent
+from tool_memo import get_tool_stats
 
 app = FastAPI()
 
@@ -17,7 +19,7 @@ app.add_middleware(
 )
 
 app.mount("/avatars", StaticFiles(directory="avatars"), name="avatars")
-app.mount("/audio", StaticFiles(directory="audio"), name="audio")
+app.mount("/audio", StaticFiles(directory="audio", check_dir=False), name="audio")
 
 
 class ChatMessage(BaseModel):
@@ -25,19 +27,31 @@ class ChatMessage(BaseModel):
     chat_history: List[Tuple[str, str]]
 
 
+@app.get("/stats/tools")
+async def tool_stats():
+    # Per-tool memo hit rates and estimated agent-loop time saved
+    return get_tool_stats()
+
+
 @app.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
     await websocket.accept()
     agent_instance = AvatarAgent()
     agent_instance.set_websocket(websocket)
+    # The trading run executes in the background so the loop keeps reading
+    # the socket and notices when the client goes away
+    run_task = None
 
     try:
         while True:
             data = await websocket.receive_json()
             if data.get("type") == "start":
                 name = data.get("name", "Misha")
-                response = await agent_instance.start(name)
-                await websocket.send_json(response)
+                if run_task is not None and not run_task.done():
+                    run_task.cancel()
+                run_task = asyncio.create_task(
+                    run_agent(websocket, agent_instance, name)
+                )
             elif data.get("type") == "message":
                 response = await agent_instance.process_message(data["message"])
                 await websocket.send_json(response)
@@ -48,7 +62,18 @@ async def websocket_chat(websocket: WebSocket):
     except Exception as e:
         print(e)
     finally:
-        await websocket.close()
+        # Stops in-flight tool calls, including swap retries, for this session
+        if run_task is not None and not run_task.done():
+            run_task.cancel()
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
+
+async def run_agent(websocket: WebSocket, agent_instance: AvatarAgent, name: str):
+    # Frames, including the final output, are streamed by the agent itself
+    await agent_instance.start(name)
 
 
 def get_avatar():
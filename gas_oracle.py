@@ -0,0 +1,225 @@
+import asyncio
+import os
+import re
+import statistics
+import time
+
+import dotenv
+
+from web3_pool import web3_pool
+
+dotenv.load_dotenv()
+
+# Percentile of recent priority fees each preset pays
+PRESETS = {"slow": 10, "standard": 50, "fast": 90}
+
+# RPC errors meaning the node will never serve eth_feeHistory
+UNSUPPORTED_PATTERN = re.compile(
+    r"-32601|method not found|not supported|not available|does not exist",
+    re.IGNORECASE,
+)
+
+
+def is_unsupported_error(error):
+    return bool(UNSUPPORTED_PATTERN.search(str(error)))
+
+
+class FeeSuggestion:
+    """
+    Fees for one preset. EIP-1559 chains get `max_fee_per_gas` and
+    `max_priority_fee_per_gas`; chains without `eth_feeHistory` get a
+    legacy `gas_price`.
+    """
+
+    __slots__ = (
+        "max_fee_per_gas",
+        "max_priority_fee_per_gas",
+        "gas_price",
+        "base_fee",
+        "sampled_at",
+    )
+
+    def __init__(
+        self,
+        max_fee_per_gas=None,
+        max_priority_fee_per_gas=None,
+        gas_price=None,
+        base_fee=None,
+        sampled_at=None,
+    ):
+        self.max_fee_per_gas = max_fee_per_gas
+        self.max_priority_fee_per_gas = max_priority_fee_per_gas
+        self.gas_price = gas_price
+        self.base_fee = base_fee
+        self.sampled_at = sampled_at
+
+    @property
+    def age(self):
+        return time.monotonic() - self.sampled_at
+
+    def to_tx_params(self):
+        if self.gas_price is not None:
+            return {"gasPrice": self.gas_price}
+        return {
+            "maxFeePerGas": self.max_fee_per_gas,
+            "maxPriorityFeePerGas": self.max_priority_fee_per_gas,
+        }
+
+    def __repr__(self):
+        if self.gas_price is not None:
+            return f"FeeSuggestion(gas_price={self.gas_price})"
+        return (
+            f"FeeSuggestion(max_fee={self.max_fee_per_gas}, "
+            f"priority={self.max_priority_fee_per_gas}, base={self.base_fee})"
+        )
+
+
+def suggest_fees(history, base_fee_multiplier=2, sampled_at=None):
+    """
+    Turns an `eth_feeHistory` result into one FeeSuggestion per preset.
+
+    The priority fee is the median over the sampled blocks of the preset's
+    reward percentile. The last `baseFeePerGas` entry is the base fee of
+    the next block; doubling it keeps the transaction includable through
+    several full blocks in a row.
+    """
+    sampled_at = sampled_at if sampled_at is not None else time.monotonic()
+    next_base_fee = history["baseFeePerGas"][-1]
+    rewards = [reward for reward in history.get("reward") or [] if reward]
+    suggestions = {}
+    for index, preset in enumerate(PRESETS):
+        priority_fee = (
+            int(statistics.median(reward[index] for reward in rewards))
+            if rewards
+            else 0
+        )
+        suggestions[preset] = FeeSuggestion(
+            max_fee_per_gas=next_base_fee * base_fee_multiplier + priority_fee,
+            max_priority_fee_per_gas=priority_fee,
+            base_fee=next_base_fee,
+            sampled_at=sampled_at,
+        )
+    return suggestions
+
+
+class ChainGasOracle:
+    """Samples one chain's fee history every `interval` seconds."""
+
+    def __init__(self, chain_name, interval, block_count, base_fee_multiplier):
+        self.chain_name = chain_name
+        self.interval = interval
+        self.block_count = block_count
+        self.base_fee_multiplier = base_fee_multiplier
+        self.suggestions = None
+        self.legacy = False
+        self.samples = 0
+        self.errors = 0
+        self._refresh_lock = asyncio.Lock()
+        self._task = None
+
+    async def refresh(self):
+        web3 = await web3_pool.get_async_web3(self.chain_name)
+        suggestions = None
+        if not self.legacy:
+            try:
+                history = await web3.eth.fee_history(
+                    self.block_count, "latest", list(PRESETS.values())
+                )
+            except Exception as e:
+                if is_unsupported_error(e):
+                    # The node lacks eth_feeHistory, so always use the gas price
+                    print(f"{self.chain_name}: fee history unsupported ({e})")
+                    self.legacy = True
+                else:
+                    # Probably transient: only this sample uses the gas price
+                    print(f"{self.chain_name}: fee history failed ({e})")
+            else:
+                if history.get("baseFeePerGas"):
+                    suggestions = suggest_fees(history, self.base_fee_multiplier)
+                else:
+                    # No base fee: the chain lacks EIP-1559
+                    print(f"{self.chain_name}: no base fee, using the gas price")
+                    self.legacy = True
+        if suggestions is None:
+            gas_price = await web3.eth.gas_price
+            now = time.monotonic()
+            suggestions = {
+                preset: FeeSuggestion(gas_price=gas_price, sampled_at=now)
+                for preset in PRESETS
+            }
+        self.suggestions = suggestions
+        self.samples += 1
+        return suggestions
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"{self.chain_name}: gas oracle refresh failed: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def suggest(self, preset, max_age):
+        if self.suggestions is None or self.suggestions[preset].age > max_age:
+            async with self._refresh_lock:
+                if (
+                    self.suggestions is None
+                    or self.suggestions[preset].age > max_age
+                ):
+                    await self.refresh()
+        self.start()
+        return self.suggestions[preset]
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class GasOracle:
+    """
+    Serves fee suggestions from memory for every chain in use.
+
+    The first request for a chain samples `eth_feeHistory` and starts a
+    background task that resamples every `interval` seconds, so later
+    transactions are priced without an RPC round trip. A sample older than
+    `max_age` (the background task has been failing) is refreshed inline.
+    """
+
+    def __init__(
+        self, interval=12.0, max_age=60.0, block_count=20, base_fee_multiplier=2
+    ):
+        self.interval = interval
+        self.max_age = max_age
+        self.block_count = block_count
+        self.base_fee_multiplier = base_fee_multiplier
+        self._chains = {}
+
+    def chain(self, chain_name):
+        chain_name = chain_name.lower()
+        oracle = self._chains.get(chain_name)
+        if oracle is None:
+            oracle = self._chains[chain_name] = ChainGasOracle(
+                chain_name, self.interval, self.block_count, self.base_fee_multiplier
+            )
+        return oracle
+
+    async def suggest(self, chain_name, preset="standard"):
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown gas preset {preset}, use one of {list(PRESETS)}.")
+        return await self.chain(chain_name).suggest(preset, self.max_age)
+
+    def stop(self):
+        for oracle in self._chains.values():
+            oracle.stop()
+
+
+gas_oracle = GasOracle(
+    interval=float(os.getenv("GAS_ORACLE_INTERVAL", 12)),
+    max_age=float(os.getenv("GAS_ORACLE_MAX_AGE", 60)),
+)
@@ -0,0 +1,29 @@
+import httpx
+
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=30
+)
+
+_clients = {}
+
+
+def get_http_client(name, **kwargs):
+    """
+    Returns the process-wide keep-alive `httpx.AsyncClient` registered under
+    `name`, creating it on first use. Keyword arguments are only applied on
+    creation.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        kwargs.setdefault("limits", DEFAULT_LIMITS)
+        client = httpx.AsyncClient(**kwargs)
+        _clients[name] = client
+    return client
+
+
+async def close_http_clients():
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,118 @@
+import os
+
+import dotenv
+import httpx
+
+from http_clients import get_http_client
+from ratelimit import AsyncRateLimiter
+from retry import FatalError, RetryableError, RetryPolicy
+from ttl_cache import TTLCache
+
+dotenv.load_dotenv()
+
+LIFI_API_URL = "https://li.quest/v1"
+
+
+class LifiClient:
+    """
+    Async client for the LI.FI API.
+
+    All requests share one keep-alive connection pool and go through a token
+    bucket sized to the LI.FI quota: LIFI_RATE_LIMIT requests per second,
+    higher by default when LIFI_API_KEY is set. Token metadata and the
+    `/tokens` list rarely change, so they are served from TTL caches. Quotes
+    and statuses are always fetched. Pass an httpx transport (the tests use
+    `MockLifiServer().transport`) to run against a mock server.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        rate_limit=None,
+        burst=10,
+        token_ttl=3600,
+        timeout=15.0,
+        transport=None,
+        retry_policy=None,
+    ):
+        self.api_key = api_key if api_key is not None else os.getenv("LIFI_API_KEY")
+        if rate_limit is None:
+            # 200 requests a minute with an API key, far less without one
+            rate_limit = float(
+                os.getenv("LIFI_RATE_LIMIT", 3.3 if self.api_key else 1.0)
+            )
+        self.limiter = AsyncRateLimiter(rate_limit, burst)
+        self.timeout = timeout
+        self.transport = transport
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=4, base_delay=0.5, max_delay=8, deadline=30
+        )
+        self.token_cache = TTLCache(ttl=token_ttl, maxsize=2048)
+        self.tokens_cache = TTLCache(ttl=token_ttl, maxsize=32)
+
+    @property
+    def client(self):
+        headers = {"accept": "application/json"}
+        if self.api_key:
+            headers["x-lifi-api-key"] = self.api_key
+        name = "lifi" if self.transport is None else f"lifi-{id(self)}"
+        kwargs = {
+            "base_url": LIFI_API_URL,
+            "headers": headers,
+            "timeout": httpx.Timeout(self.timeout, connect=5.0),
+        }
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        return get_http_client(name, **kwargs)
+
+    async def _get_once(self, path, params):
+        await self.limiter.acquire()
+        response = await self.client.get(path, params=params)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"LI.FI {path} returned HTTP {response.status_code}")
+        body = response.json()
+        if response.status_code >= 400:
+            raise FatalError(
+                f"LI.FI {path} returned HTTP {response.status_code}: "
+                f"{body.get('message', body)}"
+            )
+        return body
+
+    async def get(self, path, params=None):
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        return await self.retry_policy.run(lambda: self._get_once(path, params))
+
+    async def get_token(self, chain, token):
+        key = (str(chain), str(token))
+        token_info = self.token_cache.get(key)
+        if token_info is None:
+            token_info = await self.get("/token", {"chain": chain, "token": token})
+            self.token_cache.set(key, token_info)
+        return token_info
+
+    async def get_tokens(self, chains=None, chain_types=None):
+        key = (chains, chain_types)
+        tokens = self.tokens_cache.get(key)
+        if tokens is None:
+            tokens = await self.get(
+                "/tokens", {"chains": chains, "chainTypes": chain_types}
+            )
+            self.tokens_cache.set(key, tokens)
+        return tokens
+
+    async def get_quote(self, **params):
+        return await self.get("/quote", params)
+
+    async def get_status(self, tx_hash, bridge=None, from_chain=None, to_chain=None):
+        return await self.get(
+            "/status",
+            {
+                "txHash": tx_hash,
+                "bridge": bridge,
+                "fromChain": from_chain,
+                "toChain": to_chain,
+            },
+        )
+
+
+lifi_client = LifiClient()
@@ -0,0 +1,256 @@
+import asyncio
+import os
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from utils import (
+    get_accounts_from_env,
+    get_async_web3,
+    get_chain_id,
+    get_possible_chains,
+    get_token_info,
+)
+
+# Same address on every chain deployed with the canonical deployer
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ADDRESSES = {
+    "zksync_era": "0xF9cda624FBC7e059355ce98a31693d299FACd963",
+}
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+]
+
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+ALLOWANCE_SELECTOR = bytes.fromhex("dd62ed3e")
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")
+NATIVE_TOKEN_ADDRESSES = {None, "0x0000000000000000000000000000000000000000"}
+
+MAX_CALLS_PER_BATCH = int(os.getenv("MULTICALL_MAX_CALLS", 500))
+
+
+def get_multicall_address(chain_name):
+    """`{CHAIN}_MULTICALL_ADDRESS` overrides the default, e.g. for a local Anvil node."""
+    return Web3.to_checksum_address(
+        os.getenv(f"{chain_name.upper()}_MULTICALL_ADDRESS")
+        or MULTICALL3_ADDRESSES.get(chain_name.lower(), MULTICALL3_ADDRESS)
+    )
+
+
+def encode_balance_of(account):
+    return BALANCE_OF_SELECTOR + encode(["address"], [account])
+
+
+def encode_allowance(owner, spender):
+    return ALLOWANCE_SELECTOR + encode(["address", "address"], [owner, spender])
+
+
+def encode_get_eth_balance(account):
+    return GET_ETH_BALANCE_SELECTOR + encode(["address"], [account])
+
+
+def decode_uint(success, return_data):
+    if not success or len(return_data) < 32:
+        return None
+    return decode(["uint256"], return_data[:32])[0]
+
+
+class BalanceMatrix:
+    """
+    Dense [chain][account][token] grid of raw balances. A cell is None when
+    the token has no address on that chain or the read failed.
+    """
+
+    def __init__(self, chains, accounts, tokens, values):
+        self.chains = chains
+        self.accounts = accounts
+        self.tokens = tokens
+        self.values = values
+        self._chain_index = {chain: i for i, chain in enumerate(chains)}
+        self._account_index = {account.lower(): i for i, account in enumerate(accounts)}
+        self._token_index = {token: i for i, token in enumerate(tokens)}
+
+    def get(self, chain, account, token):
+        return self.values[self._chain_index[chain]][
+            self._account_index[account.lower()]
+        ][self._token_index[token]]
+
+
+class MulticallReader:
+    """
+    Batches ERC-20 `balanceOf`/`allowance` and native balance reads into
+    Multicall3 `aggregate3` calls, one chain per coroutine so all chains are
+    read concurrently. Chains without a Multicall3 contract fall back to
+    individual `eth_call`s sent concurrently.
+    """
+
+    def __init__(self, get_web3=get_async_web3, max_calls=MAX_CALLS_PER_BATCH):
+        self.get_web3 = get_web3
+        self.max_calls = max_calls
+        self._has_multicall = {}
+
+    async def _multicall_available(self, chain_name, web3):
+        if chain_name not in self._has_multicall:
+            code = await web3.eth.get_code(get_multicall_address(chain_name))
+            self._has_multicall[chain_name] = len(code) > 0
+        return self._has_multicall[chain_name]
+
+    async def aggregate(self, chain_name, calls):
+        """
+        Executes `calls`, a list of (target, calldata), on one chain. Returns
+        a list of (success, return_data) in the same order.
+        """
+        web3 = await self.get_web3(chain_name)
+        if not calls:
+            return []
+        if not await self._multicall_available(chain_name, web3):
+            return await self._call_individually(web3, calls)
+
+        multicall = web3.eth.contract(
+            address=get_multicall_address(chain_name), abi=MULTICALL3_ABI
+        )
+        batches = [
+            calls[start : start + self.max_calls]
+            for start in range(0, len(calls), self.max_calls)
+        ]
+        responses = await asyncio.gather(
+            *[
+                multicall.functions.aggregate3(
+                    [(target, True, data) for target, data in batch]
+                ).call()
+                for batch in batches
+            ]
+        )
+        return [tuple(result) for response in responses for result in response]
+
+    async def _call_individually(self, web3, calls):
+        async def call(target, data):
+            try:
+                if data[:4] == GET_ETH_BALANCE_SELECTOR:
+                    # Without Multicall3 the native balance is a plain RPC read
+                    (account,) = decode(["address"], data[4:])
+                    balance = await web3.eth.get_balance(account)
+                    return True, encode(["uint256"], [balance])
+                return True, bytes(await web3.eth.call({"to": target, "data": data}))
+            except Exception:
+                return False, b""
+
+        return await asyncio.gather(*[call(target, data) for target, data in calls])
+
+    async def _read_chain(self, chain_name, accounts, token_addresses):
+        multicall_address = get_multicall_address(chain_name)
+        cells = []
+        calls = []
+        for a, account in enumerate(accounts):
+            account = Web3.to_checksum_address(account)
+            for t, token_address in enumerate(token_addresses):
+                # False marks a token that does not exist on this chain
+                if token_address is False:
+                    continue
+                if token_address in NATIVE_TOKEN_ADDRESSES:
+                    calls.append((multicall_address, encode_get_eth_balance(account)))
+                else:
+                    calls.append(
+                        (
+                            Web3.to_checksum_address(token_address),
+                            encode_balance_of(account),
+                        )
+                    )
+                cells.append((a, t))
+
+        values = [[None] * len(token_addresses) for _ in accounts]
+        try:
+            results = await self.aggregate(chain_name, calls)
+        except Exception as e:
+            print(f"Balance read on {chain_name} failed: {e}")
+            return values
+        for (a, t), (success, return_data) in zip(cells, results):
+            values[a][t] = decode_uint(success, return_data)
+        return values
+
+    async def read_balances(self, accounts, tokens, token_addresses_by_chain):
+        """
+        `tokens` names the token axis. `token_addresses_by_chain` maps each
+        chain to {token: address}; None or the zero address is the native
+        coin, and tokens missing from a chain's mapping stay None.
+        """
+        chains = list(token_addresses_by_chain)
+        grids = await asyncio.gather(
+            *[
+                self._read_chain(
+                    chain,
+                    accounts,
+                    [token_addresses_by_chain[chain].get(token, False) for token in tokens],
+                )
+                for chain in chains
+            ]
+        )
+        return BalanceMatrix(chains, list(accounts), list(tokens), list(grids))
+
+    async def read_allowances(self, chain_name, owner, token_spenders):
+        """`token_spenders` is a list of (token, spender); returns allowances in order."""
+        owner = Web3.to_checksum_address(owner)
+        calls = [
+            (
+                Web3.to_checksum_address(token),
+                encode_allowance(owner, Web3.to_checksum_address(spender)),
+            )
+            for token, spender in token_spenders
+        ]
+        results = await self.aggregate(chain_name, calls)
+        return [decode_uint(success, data) for success, data in results]
+
+
+async def audit_account_balances(token_symbols=("ETH", "USDC"), chains=None):
+    """
+    Balances of every account from `get_accounts_from_env` for `token_symbols`
+    across `chains` (defaults to `get_possible_chains()`).
+    """
+    chains = chains or get_possible_chains()
+    accounts = [account["address"] for account in get_accounts_from_env()]
+
+    async def resolve(chain, symbol):
+        if symbol == "ETH":
+            return None
+        try:
+            token_info = await get_token_info(get_chain_id(chain), symbol)
+        except Exception as e:
+            print(f"{symbol} not found on {chain}: {e}")
+            return False
+        return token_info.get("address", False)
+
+    token_addresses_by_chain = {}
+    for chain in chains:
+        addresses = await asyncio.gather(
+            *[resolve(chain, symbol) for symbol in token_symbols]
+        )
+        token_addresses_by_chain[chain] = dict(zip(token_symbols, addresses))
+
+    return await MulticallReader().read_balances(
+        accounts, list(token_symbols), token_addresses_by_chain
+    )
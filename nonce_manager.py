@@ -0,0 +1,129 @@
+import asyncio
+import inspect
+import re
+import time
+
+from web3 import Web3
+
+# Node errors meaning the local nonce no longer matches the chain
+NONCE_ERROR_PATTERN = re.compile(r"nonce too low|nonce too high", re.IGNORECASE)
+# Node errors meaning it already has this exact transaction, i.e. it was sent
+KNOWN_TRANSACTION_PATTERN = re.compile(
+    r"already known|known transaction", re.IGNORECASE
+)
+
+
+def is_nonce_error(error):
+    return bool(NONCE_ERROR_PATTERN.search(str(error)))
+
+
+def is_known_transaction_error(error):
+    return bool(KNOWN_TRANSACTION_PATTERN.search(str(error)))
+
+
+class NonceState:
+    __slots__ = ("lock", "next_nonce", "synced_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.next_nonce = None
+        self.synced_at = 0.0
+
+
+class NonceManager:
+    """
+    Hands out nonces locally per (chain, account), so several transactions
+    from one account can be signed and broadcast back to back without
+    waiting for each receipt.
+
+    The first nonce comes from the node's pending transaction count. After
+    that the counter only advances once a transaction has been accepted,
+    so a failed send never leaves a gap. The counter is resynced from the
+    node when a send fails with "nonce too low/high", when a transaction
+    is dropped (`reset`), and after `sync_interval` seconds so
+    transactions sent from elsewhere are picked up. A node answering
+    "already known" has the transaction, so that counts as sent.
+    """
+
+    def __init__(self, sync_interval=30.0):
+        self.sync_interval = sync_interval
+        self.resyncs = 0
+        self._states = {}
+
+    def _state(self, chain_name, account_address):
+        key = (chain_name.lower(), account_address.lower())
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = NonceState()
+        return state
+
+    async def _sync(self, web3, account_address, state):
+        pending = await web3.eth.get_transaction_count(account_address, "pending")
+        # Never go backwards: our own transactions may not be in this node's pool yet
+        if state.next_nonce is None or pending > state.next_nonce:
+            state.next_nonce = pending
+        state.synced_at = time.monotonic()
+
+    @staticmethod
+    async def _sign(sign, nonce, on_signed=None):
+        raw_transaction = sign(nonce)
+        if inspect.isawaitable(raw_transaction):
+            raw_transaction = await raw_transaction
+        if on_signed is not None:
+            result = on_signed(nonce, Web3.keccak(raw_transaction))
+            if inspect.isawaitable(result):
+                await result
+        return raw_transaction
+
+    @staticmethod
+    async def _send(web3, raw_transaction):
+        try:
+            return await web3.eth.send_raw_transaction(raw_transaction)
+        except Exception as e:
+            if not is_known_transaction_error(e):
+                raise
+            # E.g. a retried request whose first attempt did reach the node
+            return Web3.keccak(raw_transaction)
+
+    async def send_transaction(
+        self, web3, chain_name, account_address, sign, on_signed=None
+    ):
+        """
+        Signs and broadcasts one transaction with the next nonce.
+
+        `sign(nonce)` returns the raw signed transaction, or an awaitable of
+        it; it may be called a second time with a fresh nonce after a
+        resync. `on_signed(nonce, tx_hash)` runs after each signing and
+        before the broadcast, e.g. to record the hash. Returns the hash.
+        """
+        state = self._state(chain_name, account_address)
+        async with state.lock:
+            if (
+                state.next_nonce is None
+                or time.monotonic() - state.synced_at > self.sync_interval
+            ):
+                await self._sync(web3, account_address, state)
+            try:
+                tx_hash = await self._send(
+                    web3, await self._sign(sign, state.next_nonce, on_signed)
+                )
+            except Exception as e:
+                if not is_nonce_error(e):
+                    raise
+                print(f"Nonce {state.next_nonce} rejected on {chain_name}: {e}")
+                self.resyncs += 1
+                state.next_nonce = None
+                await self._sync(web3, account_address, state)
+                tx_hash = await self._send(
+                    web3, await self._sign(sign, state.next_nonce, on_signed)
+                )
+            state.next_nonce += 1
+            return tx_hash
+
+    def reset(self, chain_name, account_address):
+        """Forgets the local counter, e.g. after a transaction was dropped."""
+        state = self._state(chain_name, account_address)
+        state.next_nonce = None
+
+
+nonce_manager = NonceManager()
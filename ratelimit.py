@@ -0,0 +1,52 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiter for coroutines: `rate` requests per second with
+    bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+_host_limiters = {}
+
+
+def get_host_limiter(url, rate, burst=None):
+    """Returns the limiter shared by every caller talking to the host of `url`."""
+    host = urlsplit(url).netloc or url
+    limiter = _host_limiters.get(host)
+    if limiter is None:
+        limiter = AsyncRateLimiter(rate, burst)
+        _host_limiters[host] = limiter
+    return limiter
@@ -0,0 +1,136 @@
+import asyncio
+import random
+import time
+
+import httpx
+import requests
+
+
+class RetryableError(Exception):
+    """Raised by callers to mark a failure as transient."""
+
+
+class FatalError(Exception):
+    """Raised by callers to mark a failure that retrying cannot fix."""
+
+
+class RetryBudgetExceeded(Exception):
+    def __init__(self, last_error, stats):
+        super().__init__(str(last_error))
+        self.last_error = last_error
+        self.stats = stats
+
+
+def is_retryable(error):
+    if isinstance(error, RetryableError):
+        return True
+    if isinstance(error, FatalError):
+        return False
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    if isinstance(error, (httpx.TransportError, requests.ConnectionError)):
+        return True
+    if isinstance(error, (requests.Timeout, asyncio.TimeoutError)):
+        return True
+    # Bad arguments and programming errors fail the same way every time
+    if isinstance(error, (ValueError, TypeError, KeyError, AttributeError)):
+        return False
+    return True
+
+
+class RetryStats:
+    __slots__ = ("attempts", "retries", "retry_wait", "elapsed", "errors")
+
+    def __init__(self):
+        self.attempts = 0
+        self.retries = 0
+        self.retry_wait = 0.0
+        self.elapsed = 0.0
+        self.errors = []
+
+    def __repr__(self):
+        return (
+            f"RetryStats(attempts={self.attempts}, retries={self.retries}, "
+            f"retry_wait={self.retry_wait:.2f}s, elapsed={self.elapsed:.2f}s)"
+        )
+
+
+class RetryPolicy:
+    """
+    Async retry loop with exponential backoff and full jitter.
+
+    Waiting uses `asyncio.sleep`, so other coroutines keep running and
+    cancelling the caller stops the loop immediately. `deadline` bounds the
+    total time spent, including the calls themselves: an attempt still
+    running at the deadline is cancelled. Totals for every run are
+    accumulated on the policy for monitoring.
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        base_delay=0.5,
+        max_delay=10.0,
+        multiplier=2.0,
+        jitter=True,
+        deadline=None,
+        classify=is_retryable,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.classify = classify
+        self.total_runs = 0
+        self.total_retries = 0
+        self.total_retry_wait = 0.0
+
+    def backoff(self, retry_number):
+        delay = min(self.max_delay, self.base_delay * self.multiplier**retry_number)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    async def run(self, operation, stats=None):
+        """
+        Awaits `operation()` until it succeeds. `operation` must return a new
+        awaitable on every call. Fatal errors are raised unchanged; when the
+        attempts or the deadline run out, raises RetryBudgetExceeded.
+        """
+        stats = stats if stats is not None else RetryStats()
+        started = time.monotonic()
+        self.total_runs += 1
+        try:
+            while True:
+                stats.attempts += 1
+                try:
+                    if self.deadline is None:
+                        return await operation()
+                    remaining = self.deadline - (time.monotonic() - started)
+                    return await asyncio.wait_for(operation(), remaining)
+                except Exception as e:
+                    stats.errors.append(e)
+                    if not self.classify(e):
+                        raise
+                    delay = self.backoff(stats.retries)
+                    elapsed = time.monotonic() - started
+                    out_of_time = (
+                        self.deadline is not None
+                        and elapsed + delay >= self.deadline
+                    )
+                    if stats.attempts >= self.max_attempts or out_of_time:
+                        raise RetryBudgetExceeded(e, stats) from e
+                    print(f"Attempt {stats.attempts} failed: {e}. Retrying in {delay:.1f}s")
+                    stats.retries += 1
+                    stats.retry_wait += delay
+                    self.total_retries += 1
+                    self.total_retry_wait += delay
+                    await asyncio.sleep(delay)
+        finally:
+            stats.elapsed = time.monotonic() - started
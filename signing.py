@@ -0,0 +1,51 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import dotenv
+
+dotenv.load_dotenv()
+
+
+def sign_evm_transaction_sync(transaction, private_key):
+    from eth_account import Account
+
+    return bytes(Account.sign_transaction(transaction, private_key).rawTransaction)
+
+
+def sign_solana_message_sync(message, keypair_bytes):
+    from solders.keypair import Keypair
+
+    return bytes(Keypair.from_bytes(keypair_bytes).sign_message(message))
+
+
+@functools.lru_cache(maxsize=1)
+def get_signing_executor():
+    """
+    Pool that signing runs in, so the event loop keeps serving other
+    accounts while a signature is computed. SIGNING_EXECUTOR=process uses
+    separate processes for true CPU parallelism; the default thread pool
+    avoids pickling and process start-up.
+    """
+    workers = int(os.getenv("SIGNING_WORKERS", os.cpu_count() or 4))
+    if os.getenv("SIGNING_EXECUTOR", "thread") == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="signing")
+
+
+async def sign_evm_transaction(transaction, private_key):
+    """Returns the raw signed transaction, ready for `send_raw_transaction`."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_signing_executor(),
+        sign_evm_transaction_sync,
+        dict(transaction),
+        private_key,
+    )
+
+
+async def sign_solana_message(message, keypair_bytes):
+    """Returns the 64-byte ed25519 signature of `message`."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_signing_executor(), sign_solana_message_sync, message, keypair_bytes
+    )
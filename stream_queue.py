@@ -0,0 +1,91 @@
+import asyncio
+import collections
+
+
+class CoalescingSendQueue:
+    """
+    Bounded outgoing frame queue for one websocket.
+
+    A background task sends frames in order. Token frames that pile up
+    behind a slow client are merged into the last queued token frame, so
+    a slow reader gets fewer, larger frames instead of an ever-growing
+    backlog. Other frames are never merged; when `maxsize` of them are
+    waiting, `put` blocks until the client catches up.
+    """
+
+    def __init__(self, send, maxsize=256):
+        self.send = send
+        self.maxsize = maxsize
+        self.sent = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.error = None
+        self._frames = collections.deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def __len__(self):
+        return len(self._frames)
+
+    async def put(self, frame):
+        if self.error is not None:
+            raise self.error
+        if (
+            frame.get("type") == "token"
+            and self._frames
+            and self._frames[-1].get("type") == "token"
+        ):
+            self._frames[-1]["text"] += frame["text"]
+            self.coalesced += 1
+            return
+        while len(self._frames) >= self.maxsize:
+            self._space.clear()
+            await self._space.wait()
+            if self.error is not None:
+                raise self.error
+        # Copy so a merged token never mutates the caller's dict
+        self._frames.append(dict(frame))
+        self.max_depth = max(self.max_depth, len(self._frames))
+        self._ready.set()
+
+    async def _run(self):
+        while True:
+            if not self._frames:
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            frame = self._frames.popleft()
+            self._space.set()
+            try:
+                await self.send(frame)
+            except Exception as e:
+                # The client is gone; wake any blocked producer
+                self.error = e
+                self._frames.clear()
+                self._space.set()
+                return
+            self.sent += 1
+
+    async def close(self):
+        """Sends what is queued, then stops the sender."""
+        self._closed = True
+        self._ready.set()
+        await self._task
+
+    def abort(self):
+        """Drops what is queued, e.g. when the run is cancelled."""
+        self._frames.clear()
+        self._task.cancel()
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "queued": len(self._frames),
+            "max_depth": self.max_depth,
+        }
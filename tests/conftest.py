@@ -0,0 +1,60 @@
+import httpx
+import pytest
+
+
+class MockLifiServer:
+    """
+    In-process stand-in for the LI.FI API, served through an httpx
+    MockTransport: `LifiClient(transport=MockLifiServer().transport)`.
+
+    Tokens, quotes and statuses are plain dicts that tests can edit.
+    `requests` records every path hit so cache behaviour can be asserted,
+    and `errors` queues HTTP status codes to answer a path with first.
+    """
+
+    def __init__(self, tokens=None, quote=None, statuses=None):
+        # {(chain, symbol_or_address): token_info}
+        self.tokens = tokens or {}
+        self.quote = quote or {}
+        # {tx_hash: [status, status, ...]}, one entry consumed per request
+        self.statuses = statuses or {}
+        self.requests = []
+        # {path: [status_code, ...]}, one entry consumed per request
+        self.errors = {}
+        self.transport = httpx.MockTransport(self.handle)
+
+    def count(self, path):
+        return sum(1 for requested in self.requests if requested == path)
+
+    def handle(self, request):
+        path = request.url.path.removeprefix("/v1")
+        params = request.url.params
+        self.requests.append(path)
+        if self.errors.get(path):
+            status_code = self.errors[path].pop(0)
+            return httpx.Response(status_code, json={"message": f"HTTP {status_code}"})
+
+        if path == "/token":
+            token = self.tokens.get((params.get("chain"), params.get("token")))
+            if token is None:
+                return httpx.Response(404, json={"message": "Token not found"})
+            return httpx.Response(200, json=token)
+        if path == "/tokens":
+            tokens = {}
+            for (chain, _), token in self.tokens.items():
+                tokens.setdefault(chain, []).append(token)
+            return httpx.Response(200, json={"tokens": tokens})
+        if path == "/quote":
+            return httpx.Response(200, json=self.quote)
+        if path == "/status":
+            statuses = self.statuses.get(params.get("txHash"), [])
+            status = statuses.pop(0) if len(statuses) > 1 else next(
+                iter(statuses), "NOT_FOUND"
+            )
+            return httpx.Response(200, json={"status": status})
+        return httpx.Response(404, json={"message": f"Unknown path {path}"})
+
+
+@pytest.fixture
+def lifi_server():
+    return MockLifiServer()
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from http_clients import close_http_clients
+from lifi_client import LifiClient
+from retry import FatalError, RetryPolicy
+
+USDC = {"address": "0xA0b8", "symbol": "USDC", "decimals": 6, "chainId": 1}
+
+
+def make_client(server):
+    return LifiClient(
+        rate_limit=1000,
+        transport=server.transport,
+        retry_policy=RetryPolicy(
+            max_attempts=3, base_delay=0.01, jitter=False, deadline=5
+        ),
+    )
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_http_clients()
+
+    return asyncio.run(main())
+
+
+def test_token_lookups_are_cached(lifi_server):
+    lifi_server.tokens[("ETH", "USDC")] = USDC
+    client = make_client(lifi_server)
+
+    async def main():
+        first = await client.get_token("ETH", "USDC")
+        second = await client.get_token("ETH", "USDC")
+        await client.get_tokens(chains="ETH")
+        await client.get_tokens(chains="ETH")
+        return first, second
+
+    first, second = run(main())
+    assert first == second == USDC
+    assert lifi_server.count("/token") == 1
+    assert lifi_server.count("/tokens") == 1
+
+
+def test_quotes_and_statuses_are_never_cached(lifi_server):
+    lifi_server.statuses["0x1"] = ["PENDING", "DONE"]
+    client = make_client(lifi_server)
+
+    async def main():
+        return [(await client.get_status("0x1"))["status"] for _ in range(2)]
+
+    assert run(main()) == ["PENDING", "DONE"]
+    assert lifi_server.count("/status") == 2
+
+
+def test_rate_limited_requests_are_retried_with_backoff(lifi_server):
+    lifi_server.tokens[("ETH", "USDC")] = USDC
+    lifi_server.errors["/token"] = [429, 503]
+    client = make_client(lifi_server)
+
+    assert run(client.get_token("ETH", "USDC")) == USDC
+    assert lifi_server.count("/token") == 3
+    assert client.retry_policy.total_retries == 2
+    # No jitter: 0.01s, then doubled
+    assert client.retry_policy.total_retry_wait == pytest.approx(0.03)
+
+
+def test_not_found_is_fatal_and_not_retried(lifi_server):
+    client = make_client(lifi_server)
+
+    with pytest.raises(FatalError, match="Token not found"):
+        run(client.get_token("ETH", "NOPE"))
+    assert lifi_server.count("/token") == 1
+    assert client.retry_policy.total_retries == 0
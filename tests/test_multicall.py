@@ -0,0 +1,176 @@
+import asyncio
+
+from eth_abi import decode, encode
+from web3 import AsyncWeb3, Web3
+from web3.providers.async_base import AsyncBaseProvider
+
+from multicall import (
+    ALLOWANCE_SELECTOR,
+    BALANCE_OF_SELECTOR,
+    GET_ETH_BALANCE_SELECTOR,
+    MULTICALL3_ADDRESS,
+    MulticallReader,
+)
+
+AGGREGATE3_SELECTOR = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+ALICE = "0x1111111111111111111111111111111111111111"
+BOB = "0x2222222222222222222222222222222222222222"
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+BROKEN = "0x3333333333333333333333333333333333333333"
+ROUTER = "0x4444444444444444444444444444444444444444"
+
+
+class FakeChainProvider(AsyncBaseProvider):
+    """
+    JSON-RPC stand-in for one chain: ERC-20 balances and allowances,
+    native balances and, optionally, a Multicall3 contract. Calls to
+    `reverting` tokens fail.
+    """
+
+    def __init__(self, has_multicall=True, reverting=()):
+        super().__init__()
+        self.has_multicall = has_multicall
+        self.reverting = {address.lower() for address in reverting}
+        self.balances = {}
+        self.allowances = {}
+        self.native = {}
+        self.batches = []
+        self.calls = []
+
+    def _call(self, target, data):
+        target = target.lower()
+        selector, arguments = data[:4], data[4:]
+        if target in self.reverting:
+            return False, b""
+        if selector == BALANCE_OF_SELECTOR:
+            (account,) = decode(["address"], arguments)
+            value = self.balances.get((target, account.lower()), 0)
+        elif selector == ALLOWANCE_SELECTOR:
+            owner, spender = decode(["address", "address"], arguments)
+            value = self.allowances.get((target, owner.lower(), spender.lower()), 0)
+        elif selector == GET_ETH_BALANCE_SELECTOR:
+            (account,) = decode(["address"], arguments)
+            value = self.native.get(account.lower(), 0)
+        else:
+            return False, b""
+        return True, encode(["uint256"], [value])
+
+    def _eth_call(self, target, data):
+        if target.lower() == MULTICALL3_ADDRESS.lower() and self.has_multicall:
+            assert data[:4] == AGGREGATE3_SELECTOR
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            self.batches.append(len(calls))
+            results = [self._call(target, call_data) for target, _, call_data in calls]
+            return True, encode(["(bool,bytes)[]"], [results])
+        self.calls.append(target)
+        return self._call(target, data)
+
+    async def make_request(self, method, params):
+        if method == "eth_chainId":
+            result = "0x1"
+        elif method == "eth_getCode":
+            address = params[0].lower()
+            deployed = self.has_multicall and address == MULTICALL3_ADDRESS.lower()
+            result = "0x6080" if deployed else "0x"
+        elif method == "eth_getBalance":
+            result = hex(self.native.get(params[0].lower(), 0))
+        elif method == "eth_call":
+            success, data = self._eth_call(
+                params[0]["to"], bytes.fromhex(params[0]["data"][2:])
+            )
+            if not success:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "error": {"code": 3, "message": "execution reverted"},
+                }
+            result = "0x" + data.hex()
+        else:
+            raise NotImplementedError(method)
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    async def is_connected(self, show_traceback=False):
+        return True
+
+
+def make_reader(provider, max_calls=500):
+    web3 = AsyncWeb3(provider)
+
+    async def get_web3(chain_name):
+        return web3
+
+    return MulticallReader(get_web3=get_web3, max_calls=max_calls)
+
+
+def fund(provider):
+    provider.balances[(USDC.lower(), ALICE)] = 5_000_000
+    provider.balances[(USDC.lower(), BOB)] = 7
+    provider.native[ALICE] = 10**18
+    provider.native[BOB] = 2
+
+
+def test_balances_are_batched_into_aggregate3():
+    provider = FakeChainProvider()
+    fund(provider)
+    reader = make_reader(provider, max_calls=3)
+
+    matrix = asyncio.run(
+        reader.read_balances(
+            [ALICE, BOB], ["ETH", "USDC"], {"base": {"ETH": None, "USDC": USDC}}
+        )
+    )
+
+    assert matrix.get("base", ALICE, "ETH") == 10**18
+    assert matrix.get("base", ALICE, "USDC") == 5_000_000
+    assert matrix.get("base", BOB, "ETH") == 2
+    assert matrix.get("base", BOB, "USDC") == 7
+    # Four reads in batches of at most three, no individual calls
+    assert provider.batches == [3, 1]
+    assert provider.calls == []
+
+
+def test_falls_back_to_individual_calls_without_multicall3():
+    provider = FakeChainProvider(has_multicall=False)
+    fund(provider)
+    reader = make_reader(provider)
+
+    matrix = asyncio.run(
+        reader.read_balances(
+            [ALICE, BOB], ["ETH", "USDC"], {"base": {"ETH": None, "USDC": USDC}}
+        )
+    )
+
+    assert matrix.values == [[[10**18, 5_000_000], [2, 7]]]
+    assert provider.batches == []
+    # Native balances are read with eth_getBalance, tokens with eth_call
+    assert len(provider.calls) == 2
+
+
+def test_failed_and_missing_tokens_are_none():
+    for has_multicall in (True, False):
+        provider = FakeChainProvider(has_multicall=has_multicall, reverting=[BROKEN])
+        fund(provider)
+        reader = make_reader(provider)
+
+        matrix = asyncio.run(
+            reader.read_balances(
+                [ALICE],
+                ["USDC", "BROKEN", "DAI"],
+                # DAI has no address on this chain
+                {"base": {"USDC": USDC, "BROKEN": BROKEN}},
+            )
+        )
+
+        assert matrix.values == [[[5_000_000, None, None]]]
+
+
+def test_allowances_in_order():
+    provider = FakeChainProvider()
+    provider.allowances[(USDC.lower(), ALICE, ROUTER.lower())] = 123
+    reader = make_reader(provider)
+
+    allowances = asyncio.run(
+        reader.read_allowances("base", ALICE, [(USDC, ROUTER), (BROKEN, ROUTER)])
+    )
+
+    assert allowances == [123, 0]
@@ -0,0 +1,96 @@
+import asyncio
+
+from web3 import Web3
+
+from nonce_manager import NonceManager
+
+
+class FakeEth:
+    """Accepts raw transactions whose nonce is the next one it expects."""
+
+    def __init__(self, pending=0):
+        self.pending = pending
+        self.sent = []
+        self.errors = []
+
+    async def get_transaction_count(self, account_address, block_identifier):
+        return self.pending
+
+    async def send_raw_transaction(self, raw_transaction):
+        await asyncio.sleep(0)
+        if self.errors:
+            raise ValueError(self.errors.pop(0))
+        nonce = int(raw_transaction.split(b":")[1])
+        if nonce < self.pending:
+            raise ValueError({"code": -32000, "message": "nonce too low"})
+        self.sent.append(nonce)
+        self.pending = nonce + 1
+        return Web3.keccak(raw_transaction)
+
+
+class FakeWeb3:
+    def __init__(self, pending=0):
+        self.eth = FakeEth(pending)
+
+
+def sign(nonce):
+    return f"tx:{nonce}".encode()
+
+
+def test_concurrent_sends_get_consecutive_nonces():
+    web3 = FakeWeb3(pending=5)
+    manager = NonceManager()
+
+    async def main():
+        return await asyncio.gather(
+            *[
+                manager.send_transaction(web3, "base", "0xabc", sign)
+                for _ in range(10)
+            ]
+        )
+
+    hashes = asyncio.run(main())
+    assert web3.eth.sent == list(range(5, 15))
+    assert len(set(hashes)) == 10
+
+
+def test_nonce_too_low_resyncs_and_retries_once():
+    web3 = FakeWeb3(pending=3)
+    manager = NonceManager()
+
+    async def main():
+        await manager.send_transaction(web3, "base", "0xabc", sign)
+        # Another wallet spent the next two nonces behind our back
+        web3.eth.pending = 6
+        return await manager.send_transaction(web3, "base", "0xabc", sign)
+
+    tx_hash = asyncio.run(main())
+    assert web3.eth.sent == [3, 6]
+    assert tx_hash == Web3.keccak(sign(6))
+    assert manager.resyncs == 1
+
+
+def test_already_known_counts_as_sent():
+    web3 = FakeWeb3(pending=0)
+    web3.eth.errors.append({"code": -32000, "message": "already known"})
+    manager = NonceManager()
+    signed = []
+
+    async def main():
+        first = await manager.send_transaction(
+            web3,
+            "base",
+            "0xabc",
+            sign,
+            on_signed=lambda nonce, tx_hash: signed.append((nonce, tx_hash)),
+        )
+        second = await manager.send_transaction(web3, "base", "0xabc", sign)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == Web3.keccak(sign(0))
+    assert signed == [(0, first)]
+    # Not resent and not resynced: the next transaction takes the next nonce
+    assert manager.resyncs == 0
+    assert web3.eth.sent == [1]
+    assert second == Web3.keccak(sign(1))
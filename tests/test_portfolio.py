@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+from actions.portfolio import PortfolioTracker
+from actions.valuation import SOL_MINT
+
+OWNER = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def token_update(token_account, mint, amount):
+    account = SimpleNamespace(
+        data=SimpleNamespace(
+            parsed={"info": {"mint": mint, "tokenAmount": {"amount": str(amount)}}}
+        )
+    )
+    value = SimpleNamespace(pubkey=token_account, account=account)
+    return SimpleNamespace(result=SimpleNamespace(value=value))
+
+
+def token_closed(token_account):
+    value = SimpleNamespace(pubkey=token_account, account=SimpleNamespace(data=b""))
+    return SimpleNamespace(result=SimpleNamespace(value=value))
+
+
+def native_update(lamports):
+    value = SimpleNamespace(lamports=lamports)
+    return SimpleNamespace(result=SimpleNamespace(value=value))
+
+
+class FakeWebsocket:
+    """Yields `batches` of notifications, then drops or stays open."""
+
+    def __init__(self, batches, drop=False):
+        self.batches = batches
+        self.drop = drop
+        self.subscriptions = []
+
+    async def account_subscribe(self, pubkey, commitment=None):
+        self.subscriptions.append(("account", str(pubkey)))
+
+    async def program_subscribe(self, pubkey, **kwargs):
+        self.subscriptions.append(("program", str(pubkey)))
+
+    async def __aiter__(self):
+        for batch in self.batches:
+            yield batch
+        if self.drop:
+            raise ConnectionError("socket closed")
+        await asyncio.Event().wait()
+
+
+def fake_connect(websockets):
+    websockets = iter(websockets)
+
+    @contextlib.asynccontextmanager
+    async def connect(url):
+        yield next(websockets)
+
+    return connect
+
+
+def balances(tokens, native_balance):
+    async def resync(owner):
+        resync.calls += 1
+        return {"tokens": tokens, "nativeBalance": native_balance}
+
+    resync.calls = 0
+    return resync
+
+
+async def wait_for(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("condition never became true")
+
+
+def amounts(snapshot):
+    """Token amounts by mint, plus the native balance (listed last) as "native"."""
+    *tokens, native = snapshot
+    assert native["mint"] == SOL_MINT
+    result = {token["mint"]: token["amount"] for token in tokens}
+    result["native"] = native["amount"]
+    return result
+
+
+def run_tracker(websockets, resync, until):
+    tracker = PortfolioTracker(
+        OWNER,
+        "ws://test",
+        resync,
+        connect=fake_connect(websockets),
+        max_reconnect_delay=0.01,
+    )
+
+    async def main():
+        tracker.start()
+        try:
+            await wait_for(lambda: until(tracker))
+        finally:
+            await tracker.stop()
+
+    asyncio.run(main())
+    return tracker
+
+
+def test_initial_resync_keeps_native_and_wrapped_sol_apart():
+    resync = balances(
+        [
+            {"mint": USDC, "amount": 5_000_000, "tokenAccount": "usdc-account"},
+            {"mint": SOL_MINT, "amount": 300, "tokenAccount": "wsol-account"},
+        ],
+        native_balance=1_000,
+    )
+    websocket = FakeWebsocket([])
+    tracker = run_tracker([websocket], resync, lambda tracker: tracker.synced)
+
+    assert amounts(tracker.snapshot()) == {
+        USDC: 5_000_000,
+        SOL_MINT: 300,
+        "native": 1_000,
+    }
+    assert websocket.subscriptions[0] == ("account", OWNER)
+    assert [kind for kind, _ in websocket.subscriptions[1:]] == ["program", "program"]
+
+
+def test_account_updates_and_close():
+    resync = balances(
+        [
+            {"mint": USDC, "amount": 10, "tokenAccount": "usdc-account"},
+            {"mint": SOL_MINT, "amount": 300, "tokenAccount": "wsol-account"},
+        ],
+        native_balance=1_000,
+    )
+    websocket = FakeWebsocket(
+        [
+            [token_update("usdc-account", USDC, 25), native_update(900)],
+            # A second USDC account adds to the first
+            [
+                token_update("other-usdc", USDC, 5),
+                token_update("wsol-account", SOL_MINT, 50),
+            ],
+            [token_closed("usdc-account")],
+        ]
+    )
+    tracker = run_tracker(
+        [websocket], resync, lambda tracker: amounts(tracker.snapshot()).get(USDC) == 5
+    )
+
+    # Neither SOL update overwrote the other
+    assert amounts(tracker.snapshot()) == {USDC: 5, SOL_MINT: 50, "native": 900}
+
+
+def test_dropped_subscription_resyncs():
+    first = balances([{"mint": USDC, "amount": 10, "tokenAccount": "a"}], 1_000)
+    websockets = [FakeWebsocket([[native_update(900)]], drop=True), FakeWebsocket([])]
+
+    def until(tracker):
+        return first.calls == 2 and tracker.synced
+
+    tracker = run_tracker(websockets, first, until)
+
+    # The resync replaced the state streamed before the drop
+    assert tracker.resyncs == 2
+    assert amounts(tracker.snapshot()) == {USDC: 10, "native": 1_000}
+
+
+def test_pending_swaps_until_the_account_updates_land():
+    tracker = PortfolioTracker(OWNER, "ws://test", balances([], 0))
+    tracker._set_token_account("usdc-account", USDC, 100)
+    tracker._set_token_account("wsol-account", SOL_MINT, 40)
+    tracker._set_native_balance(1_000)
+
+    # SOL to USDC: SOL is unwrapped, so the native balance drops
+    tracker.apply_swap(SOL_MINT, 300, USDC, 50)
+    assert amounts(tracker.snapshot()) == {USDC: 150, SOL_MINT: 40, "native": 700}
+
+    # A wrapped SOL update does not clear the pending native delta
+    tracker._set_token_account("wsol-account", SOL_MINT, 0)
+    assert amounts(tracker.snapshot()) == {USDC: 150, "native": 700}
+
+    tracker._set_token_account("usdc-account", USDC, 150)
+    tracker._set_native_balance(695)
+    assert amounts(tracker.snapshot()) == {USDC: 150, "native": 695}
+
+    # USDC back to SOL
+    tracker.apply_swap(USDC, 150, SOL_MINT, 290)
+    assert amounts(tracker.snapshot()) == {"native": 985}
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+from actions.simulation import classify_simulation_error, simulate_transaction
+
+
+class FakeClient:
+    """Answers simulateTransaction with a fixed result."""
+
+    def __init__(self, err=None, logs=None, units_consumed=None):
+        self.value = SimpleNamespace(err=err, logs=logs, units_consumed=units_consumed)
+        self.calls = []
+
+    async def simulate_transaction(self, transaction, sig_verify, commitment):
+        self.calls.append((transaction, sig_verify, commitment))
+        return SimpleNamespace(value=self.value)
+
+
+def simulate(client):
+    return asyncio.run(simulate_transaction(client, "signed-transaction"))
+
+
+def test_success_reports_compute_units():
+    client = FakeClient(logs=["Program log: ok"], units_consumed=182_345)
+    result = simulate(client)
+    assert result.ok and not result.fatal
+    assert result.units_consumed == 182_345
+    assert result.describe() == "simulation ok, 182345 compute units"
+    # Signatures are not checked, the transaction is not sent
+    assert client.calls[0][1] is False
+
+
+def test_expired_blockhash_is_retryable():
+    result = simulate(FakeClient(err="BlockhashNotFound", units_consumed=0))
+    assert not result.ok
+    assert result.retryable and not result.fatal
+
+
+def test_slippage_is_retryable():
+    result = simulate(
+        FakeClient(
+            err="InstructionError((3, Custom(6001)))",
+            logs=["Program log: Error: SlippageToleranceExceeded"],
+            units_consumed=90_000,
+        )
+    )
+    assert result.retryable
+    assert result.units_consumed == 90_000
+    assert result.describe().endswith("SlippageToleranceExceeded")
+
+
+def test_insufficient_funds_is_fatal():
+    result = simulate(
+        FakeClient(
+            err="InstructionError((2, Custom(1)))",
+            logs=["Program log: Error: insufficient funds"],
+        )
+    )
+    assert result.fatal
+
+
+def test_classification():
+    assert classify_simulation_error("InsufficientFundsForFee", []) is False
+    assert classify_simulation_error("InvalidAccountData", []) is False
+    assert classify_simulation_error("AccountInUse", []) is True
+    # Fatal patterns win over retryable ones in the same logs
+    assert classify_simulation_error("BlockhashNotFound", ["invalid mint"]) is False
+    # Unknown program errors are deterministic for a route
+    assert classify_simulation_error("InstructionError((1, Custom(42)))", []) is False
@@ -0,0 +1,14 @@
+import pytest
+
+from bench_startup import measure_once
+
+
+def test_endpoint_import_leaves_lazy_modules_unloaded():
+    try:
+        _, loaded = measure_once()
+    except RuntimeError as e:
+        if "ModuleNotFoundError" in str(e):
+            pytest.skip(f"endpoint dependencies are not installed: {e}")
+        raise
+    # measure_once reports which of LAZY_MODULES ended up in sys.modules
+    assert loaded == [], f"imported at startup: {loaded}"
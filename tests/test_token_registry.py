@@ -0,0 +1,49 @@
+import asyncio
+
+from actions.token_registry import TokenIndex, TokenRegistry
+
+USDC = {"address": "EPjFWdd5", "symbol": "USDC", "name": "USD Coin"}
+FAKE_USDC = {"address": "Scam1111", "symbol": "FUSDC", "name": "USDC"}
+BONK = {"address": "DezXAZ8z", "symbol": "Bonk", "name": "Bonk"}
+
+
+def test_symbol_beats_a_token_named_like_it():
+    # The impostor is listed first and its name is the real symbol
+    index = TokenIndex([FAKE_USDC, USDC, BONK])
+    assert index.find("USDC") is USDC
+    assert index.find("usdc ") is USDC
+
+
+def test_name_and_mint_lookups():
+    index = TokenIndex([FAKE_USDC, USDC, BONK])
+    assert index.find("usd coin") is USDC
+    assert index.find("USDCoin") is USDC
+    assert index.find("EPjFWdd5") is USDC
+    assert index.find("nothing") is None
+
+
+def test_first_listed_token_wins_a_symbol():
+    duplicate = {"address": "Other111", "symbol": "USDC", "name": "Other"}
+    index = TokenIndex([USDC, duplicate])
+    assert index.find("USDC") is USDC
+
+
+def test_registry_downloads_each_list_once():
+    calls = []
+
+    async def fetch_tokens(list_type):
+        calls.append(list_type)
+        await asyncio.sleep(0)
+        return [USDC, BONK]
+
+    registry = TokenRegistry(fetch_tokens, ttl=3600)
+
+    async def main():
+        return await asyncio.gather(
+            *[registry.find("bonk") for _ in range(5)],
+            registry.get_tokens("strict"),
+        )
+
+    results = asyncio.run(main())
+    assert results[:5] == [BONK] * 5
+    assert sorted(calls) == ["all", "strict"]
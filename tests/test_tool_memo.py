@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from tool_memo import PartialResult, invalidating, memoized, tool_run
+
+
+def counting_tool(results):
+    calls = []
+
+    async def tool(**kwargs):
+        calls.append(kwargs)
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return tool, calls
+
+
+def test_results_are_memoized_per_arguments():
+    tool, calls = counting_tool(["a", "b"])
+    wrapped = memoized("Test", tool)
+
+    async def main():
+        with tool_run():
+            return [
+                await wrapped(symbol="SOL"),
+                await wrapped(symbol="SOL"),
+                await wrapped(symbol="USDC"),
+            ]
+
+    assert asyncio.run(main()) == ["a", "a", "b"]
+    assert calls == [{"symbol": "SOL"}, {"symbol": "USDC"}]
+
+
+def test_partial_results_and_errors_are_not_kept():
+    tool, calls = counting_tool(
+        [PartialResult(1.5, ["no route"]), RuntimeError("rpc down"), 2.0]
+    )
+    wrapped = memoized("Test", tool)
+
+    async def main():
+        with tool_run():
+            first = await wrapped()
+            with pytest.raises(RuntimeError):
+                await wrapped()
+            return first, await wrapped(), await wrapped()
+
+    # The agent only ever sees the value; "error" in the output means nothing
+    assert asyncio.run(main()) == (1.5, 2.0, 2.0)
+    assert len(calls) == 3
+
+
+def test_output_mentioning_an_error_is_cached():
+    tool, calls = counting_tool(['{"name": "Error Token", "symbol": "ERR"}'])
+    wrapped = memoized("Test", tool)
+
+    async def main():
+        with tool_run():
+            return await wrapped(), await wrapped()
+
+    first, second = asyncio.run(main())
+    assert first == second and len(calls) == 1
+
+
+def test_state_changing_tool_drops_memoized_results():
+    balance, calls = counting_tool([1, 2])
+    get_balance = memoized("Balance", balance)
+    swap, _ = counting_tool([RuntimeError("timed out")])
+    swap = invalidating(swap, ["Balance"])
+
+    async def main():
+        with tool_run():
+            before = await get_balance()
+            # A failed swap may still have landed
+            with pytest.raises(RuntimeError):
+                await swap()
+            return before, await get_balance()
+
+    assert asyncio.run(main()) == (1, 2)
+    assert len(calls) == 2
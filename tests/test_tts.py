@@ -0,0 +1,89 @@
+import asyncio
+import base64
+import os
+
+from tts import AudioCache, FakeTTSBackend, TTSPipeline, split_sentences
+
+
+def test_split_sentences():
+    text = 'Hi Mr. Smith. Did it work? Yes! "It did." Ask Dr. J. Doe, e.g. now.'
+    assert split_sentences(text) == [
+        "Hi Mr. Smith.",
+        "Did it work?",
+        "Yes!",
+        '"It did."',
+        "Ask Dr. J. Doe, e.g. now.",
+    ]
+    assert split_sentences("Sent 1.5 SOL.  ") == ["Sent 1.5 SOL."]
+    assert split_sentences("   ") == []
+
+
+def store(cache, key, data):
+    return cache.add(cache.write(key, data), len(data))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=25)
+    first = store(cache, "a", b"x" * 10)
+    second = store(cache, "b", b"y" * 10)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == first
+    third = store(cache, "c", b"z" * 10)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(tmp_path / second)
+    assert cache.get("a") == first and cache.get("c") == third
+    assert cache.total_bytes == 20
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_byte_accounting(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    store(cache, "a", b"x" * 10)
+    # Rewriting a key replaces its size rather than adding to it
+    store(cache, "a", b"x" * 30)
+    store(cache, "b", b"y" * 5)
+    assert cache.total_bytes == 35
+    assert cache.stats()["files"] == 2
+    # A new cache rebuilds the index from the files on disk
+    assert AudioCache(str(tmp_path), max_bytes=100).total_bytes == 35
+
+
+def test_cache_keeps_a_file_larger_than_the_budget(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=5)
+    store(cache, "a", b"x" * 3)
+    big = store(cache, "b", b"y" * 10)
+    assert cache.get("b") == big
+    assert cache.get("a") is None
+
+
+def test_stream_frames_in_order(tmp_path):
+    backend = FakeTTSBackend(chunk_size=8)
+    pipeline = TTSPipeline(backend, AudioCache(str(tmp_path)), "http://test/audio/")
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    urls = asyncio.run(pipeline.stream("One. Two!", send))
+
+    assert [(frame["type"], frame["sentence"]) for frame in frames] == [
+        ("audio_chunk", 0),
+        ("audio_chunk", 0),
+        ("audio_done", 0),
+        ("audio_chunk", 1),
+        ("audio_chunk", 1),
+        ("audio_done", 1),
+    ]
+    chunks = [f for f in frames if f["type"] == "audio_chunk" and f["sentence"] == 0]
+    assert [f["sequence"] for f in chunks] == [0, 1]
+    audio = b"".join(base64.b64decode(f["data"]) for f in chunks)
+    assert audio == b"FAKE-AUDIO:One."
+    assert frames[2]["url"] == urls[0]
+    assert urls[0].startswith("http://test/audio/") and urls[0].endswith(".mp3")
+
+    # Cached sentences are sent as a single audio_done
+    frames.clear()
+    assert asyncio.run(pipeline.stream("Two!", send)) == urls[1:]
+    assert [frame["type"] for frame in frames] == ["audio_done"]
+    assert backend.calls == 2
@@ -0,0 +1,149 @@
+import contextlib
+import contextvars
+import functools
+import os
+import time
+
+import dotenv
+
+from ttl_cache import TTLCache
+
+dotenv.load_dotenv()
+
+_current_memo = contextvars.ContextVar("tool_memo", default=None)
+
+
+
+class PartialResult:
+    """
+    Output of a tool that is usable but incomplete, e.g. a wallet balance
+    with a token that could not be valued. The agent gets `value`; the
+    result is not memoized so the next call tries again.
+    """
+
+    __slots__ = ("value", "errors")
+
+    def __init__(self, value, errors):
+        self.value = value
+        self.errors = errors
+
+
+class ToolStats:
+    __slots__ = ("hits", "misses", "invalidations", "miss_time")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.miss_time = 0.0
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    @property
+    def saved_seconds(self):
+        """Estimated latency saved: every hit skipped an average miss."""
+        return self.hits * self.miss_time / self.misses if self.misses else 0.0
+
+    def to_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hit_rate,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+# Accumulated over every run in the process, per tool name
+tool_stats = {}
+
+
+def get_tool_stats():
+    return {name: stats.to_dict() for name, stats in tool_stats.items()}
+
+
+class ToolMemo:
+    """
+    Results of read-only tool calls for one agent run, keyed by tool name
+    and arguments. Entries also expire after `ttl` seconds so a long run
+    does not keep trading on an old balance.
+    """
+
+    def __init__(self, ttl=60):
+        self.cache = TTLCache(ttl=ttl, maxsize=256)
+
+    @staticmethod
+    def key(name, kwargs):
+        return (name, tuple(sorted((key, repr(value)) for key, value in kwargs.items())))
+
+    def invalidate(self, names):
+        names = set(names)
+        self.cache.invalidate(lambda key: key[0] in names)
+        for name in names:
+            tool_stats.setdefault(name, ToolStats()).invalidations += 1
+
+
+@contextlib.contextmanager
+def tool_run(ttl=None):
+    """Memoizes read-only tool calls made inside the block, e.g. one agent run."""
+    memo = ToolMemo(ttl if ttl is not None else float(os.getenv("TOOL_MEMO_TTL", 60)))
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+
+
+def _unwrap(result):
+    return result.value if isinstance(result, PartialResult) else result
+
+
+def memoized(name, coroutine):
+    """
+    Wraps a read-only tool coroutine; outside `tool_run` it runs uncached.
+    A tool reports a failure by raising and a degraded answer by returning
+    a `PartialResult`; neither is kept.
+    """
+
+    @functools.wraps(coroutine)
+    async def wrapper(**kwargs):
+        memo = _current_memo.get()
+        if memo is None:
+            return _unwrap(await coroutine(**kwargs))
+        stats = tool_stats.setdefault(name, ToolStats())
+        key = memo.key(name, kwargs)
+        found, result = memo.cache.get(key, (False, None))
+        if found:
+            stats.hits += 1
+            return result
+        started = time.monotonic()
+        result = await coroutine(**kwargs)
+        stats.misses += 1
+        stats.miss_time += time.monotonic() - started
+        if not isinstance(result, PartialResult):
+            memo.cache.set(key, (True, result))
+        return _unwrap(result)
+
+    return wrapper
+
+
+def invalidating(coroutine, invalidates):
+    """
+    Wraps a state-changing tool: after every call, whatever its outcome,
+    the memoized results of the `invalidates` tools are dropped for this
+    run. A failed or timed-out transaction may still have landed.
+    """
+
+    @functools.wraps(coroutine)
+    async def wrapper(**kwargs):
+        try:
+            return await coroutine(**kwargs)
+        finally:
+            memo = _current_memo.get()
+            if memo is not None:
+                memo.invalidate(invalidates)
+
+    return wrapper
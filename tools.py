@@ -3,16 +3,18 @@ from langchain.tools import StructuredTool, Tool
 from langchain_community.tools import ElevenLabsText2SpeechTool
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from actions.lify import execute_swap_on_same_chain
 from actions.jupiter import (
     execute_swap_solana,
     get_wallet_balance_with_solana_values,
     get_wallet_sol_value,
     get_token_info_by_name_or_symbol,
 )
-from actions.vision import call_vision_model_on_dexscreener, navigate_url
 
 from langchain_community.tools.tavily_search import TavilySearchResults
+from tool_memo import invalidating, memoized
+
+# Read-only tools whose results change when a swap lands
+BALANCE_TOOLS = ["GetWalletBalance", "GetSOLWalletBalance"]
 
 
 class ExecuteSwapInput(BaseModel):
@@ -24,7 +26,7 @@ class ExecuteSwapInput(BaseModel):
 
 
 execute_swap_tool = StructuredTool.from_function(
-    coroutine=execute_swap_solana,
+    coroutine=invalidating(execute_swap_solana, BALANCE_TOOLS),
     name="ExecuteSwap",
     description="Executes a token swap between two tokens on the same chain",
     args_schema=ExecuteSwapInput,
@@ -38,7 +40,7 @@ class GetTokenInfoInput(BaseModel):
 
 
 get_token_info_tool = StructuredTool.from_function(
-    coroutine=get_token_info_by_name_or_symbol,
+    coroutine=memoized("GetTokenInfo", get_token_info_by_name_or_symbol),
     name="GetTokenInfo",
     description="Get information about a token on Solana",
     args_schema=GetTokenInfoInput,
@@ -51,19 +53,32 @@ get_token_info_tool = StructuredTool.from_function(
 # )
 
 get_wallet_balance_tool = StructuredTool.from_function(
-    coroutine=get_wallet_balance_with_solana_values,
+    coroutine=memoized("GetWalletBalance", get_wallet_balance_with_solana_values),
     name="GetWalletBalance",
     description="Get the balance of your wallet on Solana",
 )
 
 
 get_wallet_balance_in_sol_values_tool = StructuredTool.from_function(
-    coroutine=get_wallet_sol_value,
+    coroutine=memoized("GetSOLWalletBalance", get_wallet_sol_value),
     name="GetSOLWalletBalance",
     description="Get the balance of your wallet in SOL value",
 )
 
 
+# The vision actions pull in seleniumbase, so they are imported on first call
+def navigate_url(url: str):
+    from actions.vision import navigate_url
+
+    return navigate_url(url)
+
+
+def call_vision_model_on_dexscreener():
+    from actions.vision import call_vision_model_on_dexscreener
+
+    return call_vision_model_on_dexscreener()
+
+
 navigate_url_tool = StructuredTool.from_function(
     name="NavigateURL",
     func=navigate_url,
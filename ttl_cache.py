@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Size-bounded LRU mapping whose entries expire `ttl` seconds after they
+    were stored. Keeps hit/miss counters for monitoring.
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None, max_age=None, accept=None):
+        """
+        Returns the live value for `key`. `max_age` tightens the TTL for this
+        lookup and `accept` can reject a stored value; both count as misses.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if (
+                age <= self.ttl
+                and (max_age is None or age <= max_age)
+                and (accept is None or accept(value))
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if age > self.ttl:
+                del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def invalidate(self, predicate=None):
+        if predicate is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,268 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Split after ., ! or ? (plus closing quotes/brackets) followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+")
+
+
+# A period after these ends an abbreviation, not a sentence ("Mr. Smith")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "e.g", "i.e"}
+
+
+def _ends_with_abbreviation(sentence):
+    last_word = sentence.rsplit(None, 1)[-1]
+    if not last_word.endswith("."):
+        return False
+    word = last_word[:-1].lstrip("\"'(").lower()
+    # Single letters are initials, as in "J. R. R. Tolkien"
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def split_sentences(text):
+    sentences = []
+    for piece in SENTENCE_BOUNDARY.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if sentences and _ends_with_abbreviation(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+class ElevenLabsBackend:
+    """Synthesizes with the ElevenLabs streaming API; blocking, run it in a thread."""
+
+    def __init__(self, voice="Rachel", model="eleven_monolingual_v1", client=None):
+        self.voice = voice
+        self.model = model
+        self._client = client
+
+    @property
+    def cache_namespace(self):
+        return f"elevenlabs:{self.voice}:{self.model}"
+
+    @property
+    def client(self):
+        if self._client is None:
+            from elevenlabs.client import ElevenLabs
+
+            self._client = ElevenLabs()
+        return self._client
+
+    def synthesize(self, text):
+        audio = self.client.generate(
+            text=text, voice=self.voice, model=self.model, stream=True
+        )
+        if isinstance(audio, bytes):
+            yield audio
+            return
+        for chunk in audio:
+            if chunk:
+                yield chunk
+
+
+class FakeTTSBackend:
+    """
+    Offline stand-in for local runs and testing: returns the text itself
+    as "audio", in `chunk_size` pieces with an optional per-chunk delay.
+    """
+
+    cache_namespace = "fake"
+
+    def __init__(self, chunk_size=16, delay=0.0):
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.calls = 0
+
+    def synthesize(self, text):
+        self.calls += 1
+        data = f"FAKE-AUDIO:{text}".encode()
+        for start in range(0, len(data), self.chunk_size):
+            if self.delay:
+                time.sleep(self.delay)
+            yield data[start : start + self.chunk_size]
+
+
+class AudioCache:
+    """
+    Content-addressed MP3 files in `directory`, evicted least recently used
+    first once they total more than `max_bytes`.
+    """
+
+    def __init__(self, directory="audio", max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # Oldest access first, rebuilt from file mtimes on start-up
+        files = [
+            entry
+            for entry in os.scandir(directory)
+            if entry.is_file() and entry.name.endswith(".mp3")
+        ]
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        self._files = OrderedDict((entry.name, entry.stat().st_size) for entry in files)
+        self.total_bytes = sum(self._files.values())
+
+    @staticmethod
+    def key(namespace, text):
+        return hashlib.sha256(f"{namespace}\n{text}".encode()).hexdigest()[:32]
+
+    def filename(self, key):
+        return f"{key}.mp3"
+
+    def get(self, key):
+        """Returns the cached file name or None."""
+        filename = self.filename(key)
+        if filename not in self._files:
+            self.misses += 1
+            return None
+        self._files.move_to_end(filename)
+        try:
+            os.utime(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            self.total_bytes -= self._files.pop(filename)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return filename
+
+    def write(self, key, data):
+        """
+        Writes the file without touching the index, so it can run in a
+        worker thread; follow it with `add` on the event loop.
+        """
+        filename = self.filename(key)
+        path = os.path.join(self.directory, filename)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+        return filename
+
+    def add(self, filename, size):
+        self.total_bytes -= self._files.pop(filename, 0)
+        self._files[filename] = size
+        self.total_bytes += size
+        self._evict(keep=filename)
+        return filename
+
+    def _evict(self, keep):
+        while self.total_bytes > self.max_bytes and len(self._files) > 1:
+            filename, size = next(iter(self._files.items()))
+            if filename == keep:
+                break
+            del self._files[filename]
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TTSPipeline:
+    """
+    Speaks agent output sentence by sentence so playback starts after the
+    first sentence instead of the whole answer.
+
+    For every sentence `stream` sends `audio_chunk` frames (base64 MP3
+    bytes) as the backend produces them and then an `audio_done` frame
+    with the cached file's URL. Sentences already in the cache are sent as
+    a single `audio_done`. The blocking backend runs in worker threads so
+    the event loop keeps serving other sessions.
+    """
+
+    def __init__(self, backend, cache, base_url):
+        self.backend = backend
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, filename):
+        return f"{self.base_url}/{filename}"
+
+    async def _synthesize(self, text, on_chunk=None):
+        iterator = await asyncio.to_thread(self.backend.synthesize, text)
+        chunks = []
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, None)
+            if chunk is None:
+                break
+            chunks.append(chunk)
+            if on_chunk is not None:
+                await on_chunk(chunk, len(chunks) - 1)
+        return b"".join(chunks)
+
+    async def stream(self, text, send):
+        """`send` is an async callable taking one JSON-serializable frame."""
+        urls = []
+        for index, sentence in enumerate(split_sentences(text)):
+            key = self.cache.key(self.backend.cache_namespace, sentence)
+            filename = self.cache.get(key)
+            if filename is None:
+
+                async def on_chunk(chunk, sequence, index=index):
+                    await send(
+                        {
+                            "type": "audio_chunk",
+                            "sentence": index,
+                            "sequence": sequence,
+                            "data": base64.b64encode(chunk).decode(),
+                        }
+                    )
+
+                data = await self._synthesize(sentence, on_chunk)
+                # Only the file write runs in a thread; the index stays on the loop
+                filename = self.cache.add(
+                    await asyncio.to_thread(self.cache.write, key, data), len(data)
+                )
+            url = self.url(filename)
+            urls.append(url)
+            await send(
+                {"type": "audio_done", "sentence": index, "text": sentence, "url": url}
+            )
+        return urls
+
+
+@functools.lru_cache(maxsize=1)
+def get_tts_pipeline():
+    if os.getenv("TTS_BACKEND", "elevenlabs") == "fake":
+        backend = FakeTTSBackend()
+    else:
+        backend = ElevenLabsBackend(
+            voice=os.getenv("TTS_VOICE", "Rachel"),
+            model=os.getenv("TTS_MODEL", "eleven_monolingual_v1"),
+        )
+    root = os.getenv("ROOT_URL", "http://localhost:8000")
+    return TTSPipeline(
+        backend,
+        AudioCache(
+            "audio", max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+        ),
+        f"{root}/audio",
+    )
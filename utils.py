@@ -3,7 +3,11 @@ import dotenv
 import json
 import os
 import random
-import requests
+
+from chain_registry import get_chain_registry
+from gas_oracle import gas_oracle
+from lifi_client import lifi_client
+from web3_pool import web3_pool
 
 dotenv.load_dotenv()
 
@@ -13,19 +17,11 @@ def get_possible_chains():
 
 
 def get_chain_key(chain_name):
-    chain_name = chain_name.lower()
-    lifi_chains = json.load(open("lifi-chains.json"))
-    for chain in lifi_chains:
-        if chain["name"].lower() == chain_name:
-            return chain["key"]
+    return get_chain_registry().chain_key(chain_name)
 
 
 def get_chain_id(chain_name):
-    chain_name = chain_name.lower()
-    lifi_chains = json.load(open("lifi-chains.json"))
-    for chain in lifi_chains:
-        if chain["name"].lower() == chain_name:
-            return chain["id"]
+    return get_chain_registry().chain_id(chain_name)
 
 
 def convert_eth_to_wei(amount_eth):
@@ -65,27 +61,22 @@ def get_accounts_from_file():
         return json.load(file)
 
 
-def load_files():
-    hNFT_addresses = json.load(open("hNFT-addresses.json"))
-    hFT_addresses = json.load(open("hFT-addresses.json"))
-    domains = json.load(open("domains.json"))
-    hNFT_abi = json.load(open("abi/hNFT-abi.json"))
-    hFT_abi = json.load(open("abi/hFT-abi.json"))
-    erc20_abi = json.load(open("abi/lifi-erc20-abi.json"))
-    lifi_chains = json.load(open("lifi-chains.json"))
-
+def get_alchemy_url_list():
     networks = get_possible_chains()
-    alchemy_url_list = {chain: os.getenv(f"{chain.upper()}_URL") for chain in networks}
+    return {chain: os.getenv(f"{chain.upper()}_URL") for chain in networks}
 
+
+def load_files():
+    registry = get_chain_registry()
     return (
-        hNFT_addresses,
-        hFT_addresses,
-        domains,
-        alchemy_url_list,
-        hNFT_abi,
-        hFT_abi,
-        erc20_abi,
-        lifi_chains,
+        registry.hnft_addresses,
+        registry.hft_addresses,
+        registry.domains,
+        get_alchemy_url_list(),
+        registry.abi("hNFT"),
+        registry.abi("hFT"),
+        registry.abi("erc20"),
+        registry.chains,
     )
 
 
@@ -94,45 +85,45 @@ def init_web3(provider_url):
     return Web3(Web3.HTTPProvider(provider_url))
 
 
+# Pooled providers for a chain, reusing keep-alive sessions across calls
+def get_web3(chain_name):
+    return web3_pool.get_web3(chain_name)
+
+
+async def get_async_web3(chain_name):
+    return await web3_pool.get_async_web3(chain_name)
+
+
 # Function to read ABI from a local file
 def load_abi(file_path):
     with open(file_path, "r") as file:
         return json.load(file)
 
 
-def estimate_gas_price(web3):
-    gas_price = web3.eth.gas_price
-    return gas_price
-
-
-def get_token_info(chain, symbol):
-    url = "https://li.quest/v1/token"
-    headers = {"accept": "application/json"}
-    response = requests.get(
-        url, headers=headers, params={"chain": chain, "token": symbol}
-    )
-    return response.json()
+async def estimate_gas_price(chain_name, preset="standard"):
+    # Served from the gas oracle's last fee history sample
+    suggestion = await gas_oracle.suggest(chain_name, preset)
+    return suggestion.gas_price or suggestion.max_fee_per_gas
 
 
-def get_token_balance(chain_name, account_address, token_symbol):
-    _, _, _, alchemy_url_list, _, _, erc20_abi, _ = load_files()
+async def get_token_info(chain, symbol):
+    return await lifi_client.get_token(chain, symbol)
 
-    alchemy_url = alchemy_url_list.get(chain_name)
-    if not alchemy_url:
-        raise ValueError(f"Alchemy URL for chain {chain_name} not found.")
 
-    web3 = init_web3(alchemy_url)
+async def get_token_balance(chain_name, account_address, token_symbol):
+    web3 = await get_async_web3(chain_name)
     if token_symbol == "ETH":
-        balance = web3.eth.get_balance(Web3.to_checksum_address(account_address))
+        balance = await web3.eth.get_balance(Web3.to_checksum_address(account_address))
         return balance
 
-    token_info = get_token_info(get_chain_id(chain_name), token_symbol)
+    token_info = await get_token_info(get_chain_id(chain_name), token_symbol)
     token_address = token_info["address"]
 
     token_contract = web3.eth.contract(
-        address=Web3.to_checksum_address(token_address), abi=erc20_abi
+        address=Web3.to_checksum_address(token_address),
+        abi=get_chain_registry().abi("erc20"),
     )
-    balance = token_contract.functions.balanceOf(
+    balance = await token_contract.functions.balanceOf(
         Web3.to_checksum_address(account_address)
     ).call()
     return balance
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import threading
+import time
+
+import aiohttp
+import dotenv
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.base import BaseProvider
+
+dotenv.load_dotenv()
+
+
+def get_chain_urls(chain_name):
+    """
+    RPC URLs for a chain from the environment: `{CHAIN}_URL` first, then any
+    fallbacks numbered `{CHAIN}_URL_2`, `{CHAIN}_URL_3`, ...
+    """
+    prefix = f"{chain_name.upper()}_URL"
+    urls = [os.getenv(prefix)] if os.getenv(prefix) else []
+    index = 2
+    while os.getenv(f"{prefix}_{index}"):
+        urls.append(os.getenv(f"{prefix}_{index}"))
+        index += 1
+    return urls
+
+
+class EndpointHealth:
+    """Request latency and recent failures of one RPC URL."""
+
+    __slots__ = ("url", "requests", "failures", "latency_ms", "failed_at")
+
+    def __init__(self, url):
+        self.url = url
+        self.requests = 0
+        self.failures = 0
+        self.latency_ms = None
+        self.failed_at = None
+
+    def record(self, latency_ms, ok, alpha=0.2):
+        self.requests += 1
+        if not ok:
+            self.failures += 1
+            self.failed_at = time.monotonic()
+            return
+        self.failed_at = None
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += alpha * (latency_ms - self.latency_ms)
+
+    def score(self, cooldown):
+        # A URL that just failed goes last until the cooldown has passed
+        if self.failed_at is not None and time.monotonic() - self.failed_at < cooldown:
+            return (1, 0.0)
+        # Unmeasured URLs rank first so they get sampled
+        return (0, self.latency_ms if self.latency_ms is not None else 0.0)
+
+
+class ChainProviders:
+    """
+    Sync and async Web3 instances for one chain whose requests go to the
+    healthiest RPC URL: URLs are ranked by measured latency, and one that
+    fails with a connection error or timeout is skipped for `cooldown`
+    seconds while the request is retried on the next one.
+    """
+
+    def __init__(self, chain_name, urls, timeout, max_connections, cooldown=30.0):
+        self.chain_name = chain_name
+        self.urls = urls
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cooldown = cooldown
+        self.failovers = 0
+        self.health = {url: EndpointHealth(url) for url in urls}
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(urls), pool_maxsize=max_connections
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._http = {}
+        self._async_http = {}
+        self._web3 = None
+        self._async_web3 = None
+
+    def ranked_urls(self):
+        return sorted(self.urls, key=lambda url: self.health[url].score(self.cooldown))
+
+    def _record(self, url, started, error=None):
+        self.health[url].record((time.perf_counter() - started) * 1000, error is None)
+        if error is not None:
+            number = self.urls.index(url) + 1
+            print(f"{self.chain_name}: RPC request to URL #{number} failed: {error}")
+
+    def _http_provider(self, url):
+        if url not in self._http:
+            self._http[url] = Web3.HTTPProvider(
+                url, request_kwargs={"timeout": self.timeout}, session=self._session
+            )
+        return self._http[url]
+
+    async def _async_http_provider(self, url):
+        if url not in self._async_http:
+            provider = AsyncWeb3.AsyncHTTPProvider(
+                url, request_kwargs={"timeout": self.timeout}
+            )
+            await provider.cache_async_session(
+                aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.max_connections),
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                )
+            )
+            self._async_http[url] = provider
+        return self._async_http[url]
+
+    def request(self, method, params):
+        error = None
+        for attempt, url in enumerate(self.ranked_urls()):
+            started = time.perf_counter()
+            try:
+                response = self._http_provider(url).make_request(method, params)
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.HTTPError,
+            ) as e:
+                self._record(url, started, e)
+                error = e
+                continue
+            self._record(url, started)
+            self.failovers += attempt > 0
+            return response
+        raise error
+
+    async def request_async(self, method, params):
+        error = None
+        for attempt, url in enumerate(self.ranked_urls()):
+            started = time.perf_counter()
+            try:
+                provider = await self._async_http_provider(url)
+                response = await provider.make_request(method, params)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Connection errors, timeouts and HTTP errors such as 429
+                self._record(url, started, e)
+                error = e
+                continue
+            self._record(url, started)
+            self.failovers += attempt > 0
+            return response
+        raise error
+
+    def web3(self):
+        if self._web3 is None:
+            self._web3 = Web3(FailoverHTTPProvider(self))
+        return self._web3
+
+    def async_web3(self):
+        if self._async_web3 is None:
+            self._async_web3 = AsyncWeb3(FailoverAsyncHTTPProvider(self))
+        return self._async_web3
+
+
+class FailoverHTTPProvider(BaseProvider):
+    def __init__(self, providers):
+        super().__init__()
+        self.providers = providers
+
+    def make_request(self, method, params):
+        return self.providers.request(method, params)
+
+    def is_connected(self, show_traceback=False):
+        try:
+            return "result" in self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+
+class FailoverAsyncHTTPProvider(AsyncBaseProvider):
+    def __init__(self, providers):
+        super().__init__()
+        self.providers = providers
+
+    async def make_request(self, method, params):
+        return await self.providers.request_async(method, params)
+
+    async def is_connected(self, show_traceback=False):
+        try:
+            return "result" in await self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+
+class Web3Pool:
+    """
+    One set of providers per chain, so every balance read and swap reuses the
+    same keep-alive HTTP sessions instead of opening a new connection, and
+    fails over between the chain's configured URLs on its own.
+    """
+
+    def __init__(self, timeout=10, max_connections=10):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._chains = {}
+        self._lock = threading.Lock()
+
+    def providers(self, chain_name):
+        chain_name = chain_name.lower()
+        with self._lock:
+            providers = self._chains.get(chain_name)
+            if providers is None:
+                urls = get_chain_urls(chain_name)
+                if not urls:
+                    raise ValueError(f"Alchemy URL for chain {chain_name} not found.")
+                providers = ChainProviders(
+                    chain_name, urls, self.timeout, self.max_connections
+                )
+                self._chains[chain_name] = providers
+        return providers
+
+    def get_web3(self, chain_name):
+        return self.providers(chain_name).web3()
+
+    async def get_async_web3(self, chain_name):
+        return self.providers(chain_name).async_web3()
+
+
+web3_pool = Web3Pool(
+    timeout=float(os.getenv("WEB3_REQUEST_TIMEOUT", 10)),
+    max_connections=int(os.getenv("WEB3_MAX_CONNECTIONS", 10)),
+)